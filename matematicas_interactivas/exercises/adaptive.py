@@ -0,0 +1,129 @@
+"""Planificador adaptativo de ejercicios.
+
+Para cada usuario se guarda en caché una estructura pequeña con, por
+operación, la precisión y el tiempo de respuesta recientes (medias móviles
+exponenciales) y el nivel de dificultad en el que está. Actualizarla tras un
+intento y elegir el siguiente ejercicio cuesta O(1): no se consulta el
+historial de intentos.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+
+from users.models import OperationStats
+from .bank import get_bank_exercise_ids
+from .generator import DIFFICULTY_RANGES, OPERATION_TYPES, default_generator
+from .models import DifficultyLevel, Exercise
+
+STATS_TIMEOUT = 60 * 60 * 24 * 30
+
+# Peso de cada intento nuevo en las medias móviles
+SMOOTHING = 0.3
+
+# Precisión a partir de la cual se sube de nivel y por debajo de la cual se baja
+LEVEL_UP_ACCURACY = 0.85
+LEVEL_DOWN_ACCURACY = 0.6
+
+# Intentos mínimos en un nivel antes de volver a cambiarlo
+ATTEMPTS_PER_LEVEL = 3
+
+# Segundos esperados por ejercicio en cada nivel; más lento no sube de nivel
+TARGET_SECONDS = {1: 10, 2: 20, 3: 30}
+
+# Peso mínimo de cada operación, para seguir practicando las que ya se dominan
+EXPLORATION = 0.1
+
+MIN_LEVEL, MAX_LEVEL = min(DIFFICULTY_RANGES), max(DIFFICULTY_RANGES)
+
+
+def _cache():
+    return caches[getattr(settings, 'EXERCISE_STATE_CACHE_ALIAS', 'default')]
+
+
+def _stats_key(user_id):
+    return f"adaptive_stats:{user_id}"
+
+
+def _middle_accuracy():
+    return (LEVEL_UP_ACCURACY + LEVEL_DOWN_ACCURACY) / 2
+
+
+def initial_stats(user_id, level):
+    """Estadísticas de partida, a partir de las estadísticas acumuladas del usuario"""
+    stats = {
+        operation_type: {'accuracy': _middle_accuracy(), 'seconds': None, 'level': level, 'attempts': 0}
+        for operation_type in OPERATION_TYPES
+    }
+    for row in OperationStats.objects.filter(user_id=user_id).by_operation():
+        if row['total']:
+            stats[row['operation_type']]['accuracy'] = row['correct'] / row['total']
+    return stats
+
+
+def get_stats(user_id, level=MIN_LEVEL):
+    """Devuelve las estadísticas del usuario; si no están en caché, las crea"""
+    stats = _cache().get(_stats_key(user_id))
+    if stats is None:
+        stats = initial_stats(user_id, level)
+        _cache().set(_stats_key(user_id), stats, timeout=STATS_TIMEOUT)
+    return stats
+
+
+def update_stats(stats, operation_type, is_correct, seconds):
+    """Incorpora un intento a las estadísticas de su operación y ajusta el nivel"""
+    operation = stats[operation_type]
+    operation['accuracy'] += SMOOTHING * ((1 if is_correct else 0) - operation['accuracy'])
+    if operation['seconds'] is None:
+        operation['seconds'] = seconds
+    else:
+        operation['seconds'] += SMOOTHING * (seconds - operation['seconds'])
+    operation['attempts'] += 1
+
+    if operation['attempts'] < ATTEMPTS_PER_LEVEL:
+        return stats
+    level = operation['level']
+    if (operation['accuracy'] >= LEVEL_UP_ACCURACY
+            and operation['seconds'] <= TARGET_SECONDS.get(level, TARGET_SECONDS[MAX_LEVEL])
+            and level < MAX_LEVEL):
+        level += 1
+    elif operation['accuracy'] < LEVEL_DOWN_ACCURACY and level > MIN_LEVEL:
+        level -= 1
+    if level != operation['level']:
+        # En el nivel nuevo se empieza desde una precisión neutra
+        operation.update(level=level, accuracy=_middle_accuracy(), attempts=0)
+    return stats
+
+
+def record_result(user_id, operation_type, is_correct, seconds):
+    """Actualiza en caché las estadísticas del usuario tras un intento"""
+    stats = update_stats(get_stats(user_id), operation_type, is_correct, seconds)
+    _cache().set(_stats_key(user_id), stats, timeout=STATS_TIMEOUT)
+
+
+def choose_next(stats, rng=random):
+    """Elige la operación y el nivel del siguiente ejercicio.
+
+    Las operaciones con menor precisión reciente salen con más frecuencia.
+    """
+    weights = [1 - stats[operation_type]['accuracy'] + EXPLORATION for operation_type in OPERATION_TYPES]
+    operation_type = rng.choices(OPERATION_TYPES, weights=weights)[0]
+    return operation_type, stats[operation_type]['level']
+
+
+def next_exercise_id(user_id, start_level=MIN_LEVEL):
+    """Devuelve el id en el banco del siguiente ejercicio adaptado al usuario"""
+    operation_type, level = choose_next(get_stats(user_id, start_level))
+    exercise_data = default_generator.generate(operation_type, level, 1)
+    data = exercise_data[0]
+    # Con el banco cargado basta una búsqueda por índice
+    exercise_id = Exercise.objects.filter(
+        operation_type=operation_type, difficulty__value=level,
+        operand1=data['operand1'], operand2=data['operand2'],
+    ).values_list('id', flat=True).first()
+    if exercise_id is not None:
+        return exercise_id
+    # Solo se guarda este ejercicio si falta, sin rellenar todo el nivel. Si
+    # el nivel no existe falla aquí, y no con un IntegrityError al guardar
+    difficulty_level = DifficultyLevel.objects.get(value=level)
+    return get_bank_exercise_ids(exercise_data, difficulty_level)[0]
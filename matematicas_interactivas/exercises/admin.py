@@ -1,5 +1,12 @@
+import math
+
 from django.contrib import admin
-from .models import Category, DifficultyLevel, Exercise, ExerciseSession, ExerciseAttempt
+from django.forms.models import BaseInlineFormSet
+from django.utils.html import format_html, format_html_join
+
+from matematicas_interactivas.pagination import EstimatedCountPaginator
+
+from .models import Category, DifficultyLevel, Exercise, ExerciseSession, ExerciseAttempt, ReviewItem
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -18,24 +25,97 @@ class ExerciseAdmin(admin.ModelAdmin):
     list_filter = ('operation_type', 'difficulty', 'category')
     search_fields = ('question',)
 
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Formset que solo carga una página de los objetos relacionados"""
+    per_page = 50
+    page = 1
+    
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset()
+            start = (self.page - 1) * self.per_page
+            self._queryset = queryset[start:start + self.per_page]
+        return self._queryset
+
 class ExerciseAttemptInline(admin.TabularInline):
+    """Intentos de la sesión, de solo lectura y por páginas"""
     model = ExerciseAttempt
+    formset = PaginatedInlineFormSet
+    per_page = 50
+    page_param = 'intentos'
     extra = 0
-    readonly_fields = ('exercise', 'user_answer', 'is_correct', 'time_taken', 'created_at')
+    can_delete = False
+    fields = ('position', 'exercise', 'user_answer', 'is_correct', 'time_taken', 'created_at')
+    readonly_fields = fields
+    ordering = ('created_at', 'pk')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('exercise')
+    
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page = self.get_page_number(request)
+        return formset
+    
+    def get_page_number(self, request):
+        try:
+            return max(1, int(request.GET.get(self.page_param, 1)))
+        except ValueError:
+            return 1
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
 
 @admin.register(ExerciseSession)
 class ExerciseSessionAdmin(admin.ModelAdmin):
     list_display = ('user', 'start_time', 'end_time', 'total_exercises', 'correct_answers', 'accuracy')
-    list_filter = ('user', 'start_time', 'difficulty', 'category')
+    list_select_related = ('user',)
+    # Sin filtro por usuario: cargaría todos los usuarios en la barra lateral
+    list_filter = ('difficulty', 'category', 'adaptive')
     search_fields = ('user__username',)
+    date_hierarchy = 'start_time'
+    autocomplete_fields = ('user',)
+    readonly_fields = ('attempt_pages',)
     inlines = [ExerciseAttemptInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def accuracy(self, obj):
         return f"{obj.accuracy()}%"
     accuracy.short_description = 'Precisión'
+    
+    def attempt_pages(self, obj):
+        if obj.pk is None:
+            return '-'
+        total = obj.attempts.count()
+        pages = math.ceil(total / ExerciseAttemptInline.per_page)
+        if pages <= 1:
+            return f"{total} intentos"
+        links = format_html_join(
+            ' ', '<a href="?{}={}">{}</a>',
+            ((ExerciseAttemptInline.page_param, page, page) for page in range(1, pages + 1))
+        )
+        return format_html('{} intentos, {} por página: {}', total, ExerciseAttemptInline.per_page, links)
+    attempt_pages.short_description = 'Páginas de intentos'
 
 @admin.register(ExerciseAttempt)
 class ExerciseAttemptAdmin(admin.ModelAdmin):
-    list_display = ('session', 'exercise', 'user_answer', 'is_correct', 'time_taken')
-    list_filter = ('is_correct', 'session__user')
-    search_fields = ('session__user__username', 'exercise__question')
\ No newline at end of file
+    list_display = ('session', 'exercise', 'user_answer', 'is_correct', 'time_taken', 'created_at')
+    # El __str__ de la sesión usa su usuario
+    list_select_related = ('session__user', 'exercise')
+    list_filter = ('is_correct', 'exercise__operation_type')
+    search_fields = ('session__user__username', 'exercise__question')
+    date_hierarchy = 'created_at'
+    raw_id_fields = ('session', 'exercise')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(ReviewItem)
+class ReviewItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'exercise', 'due_at', 'interval', 'repetitions', 'lapses')
+    search_fields = ('user__username', 'exercise__question')
+    list_filter = ('due_at',)
@@ -0,0 +1,83 @@
+"""Banco de ejercicios pre-generados y deduplicados.
+
+Cada ejercicio queda identificado por (operation_type, difficulty, operand1,
+operand2), de modo que servir un ejercicio es una búsqueda por índice y no un
+INSERT por petición.
+"""
+import numpy as np
+
+from .generator import OPERATION_TYPES, build_arrays, operand_range, to_exercises
+from .models import Category, DifficultyLevel, Exercise
+
+DEFAULT_CATEGORY_NAME = "Aritmética Básica"
+
+
+def ensure_defaults():
+    """Crea la categoría y los niveles de dificultad por defecto si no existen"""
+    if not Category.objects.exists():
+        Category.objects.create(name=DEFAULT_CATEGORY_NAME, description="Operaciones aritméticas básicas")
+
+    if not DifficultyLevel.objects.exists():
+        DifficultyLevel.objects.bulk_create([
+            DifficultyLevel(name="Fácil", description="Números del 1 al 10", value=1),
+            DifficultyLevel(name="Medio", description="Números del 10 al 50", value=2),
+            DifficultyLevel(name="Difícil", description="Números del 50 al 100", value=3),
+        ])
+
+
+def fill_exercise_bank(difficulty_level, operation_types=None, category=None, batch_size=500):
+    """Rellena el banco con todas las combinaciones de operandos de un nivel.
+
+    Usa ``bulk_create(ignore_conflicts=True)``, por lo que puede ejecutarse
+    varias veces (o en paralelo) sin duplicar filas. Devuelve el número de
+    ejercicios enviados a la base de datos.
+    """
+    if category is None:
+        category, _ = Category.objects.get_or_create(name=DEFAULT_CATEGORY_NAME)
+
+    low, high = operand_range(difficulty_level.value)
+    numbers = np.arange(low, high + 1)
+    operand1, operand2 = (grid.ravel() for grid in np.meshgrid(numbers, numbers))
+
+    exercises = []
+    for operation_type in operation_types or OPERATION_TYPES:
+        codes = np.full(operand1.size, OPERATION_TYPES.index(operation_type))
+        codes, num1, num2, answers = build_arrays(codes, operand1, operand2)
+        # La resta ordena los operandos, así que (a, b) y (b, a) coinciden
+        pairs = np.unique(np.stack([num1, num2, answers]), axis=1)
+        for data in to_exercises(codes[:pairs.shape[1]], *pairs):
+            exercises.append(Exercise(category=category, difficulty=difficulty_level, **data))
+
+    Exercise.objects.bulk_create(exercises, batch_size=batch_size, ignore_conflicts=True)
+    return len(exercises)
+
+
+def get_bank_exercise_ids(exercises_data, difficulty_level, category=None):
+    """Guarda un lote de ejercicios en el banco y devuelve sus ids en orden.
+
+    Se hace un único ``bulk_create(ignore_conflicts=True)`` para los que
+    falten y una única consulta para resolver los ids de todo el lote. La
+    consulta filtra con ``__in`` por cada columna y las claves se emparejan
+    en Python: un ``OR`` por clave supera el límite de profundidad de las
+    expresiones de SQLite a partir de unas mil claves.
+    """
+    if category is None:
+        category, _ = Category.objects.get_or_create(name=DEFAULT_CATEGORY_NAME)
+
+    Exercise.objects.bulk_create(
+        [Exercise(category=category, difficulty=difficulty_level, **data) for data in exercises_data],
+        ignore_conflicts=True,
+    )
+
+    keys = {(data['operation_type'], data['operand1'], data['operand2']) for data in exercises_data}
+    rows = Exercise.objects.filter(
+        difficulty=difficulty_level,
+        operation_type__in={operation_type for operation_type, _, _ in keys},
+        operand1__in={operand1 for _, operand1, _ in keys},
+        operand2__in={operand2 for _, _, operand2 in keys},
+    ).values_list('operation_type', 'operand1', 'operand2', 'id')
+    # Los filtros por columna pueden traer combinaciones de más: solo se
+    # guardan las del lote
+    ids_by_key = {(op_type, op1, op2): pk for op_type, op1, op2, pk in rows if (op_type, op1, op2) in keys}
+
+    return [ids_by_key[(data['operation_type'], data['operand1'], data['operand2'])] for data in exercises_data]
@@ -0,0 +1,4 @@
+"""Constantes de los ejercicios que usan otras aplicaciones sin cargar NumPy."""
+
+# Tipos de operación, en el orden de los códigos del generador
+OPERATION_TYPES = ['addition', 'subtraction', 'multiplication', 'division']
@@ -0,0 +1,146 @@
+"""Exportación masiva de intentos en CSV o JSON por líneas.
+
+Los intentos se leen con ``values_list`` (las relaciones se resuelven con
+JOIN en la misma consulta) en bloques de ``CHUNK_SIZE`` filas, continuando
+por id (keyset), y cada bloque se serializa y se entrega en cuanto se lee.
+La memoria usada no depende del número de filas exportadas. Hay una versión
+síncrona para el comando de gestión y otra asíncrona para la vista, que con
+ASGI lee cada bloque con el ORM asíncrono en lugar de cargar toda la
+exportación antes de enviar el primer byte.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import ExerciseAttempt
+
+CHUNK_SIZE = 2000
+
+# (columna, campo del intento)
+EXPORT_FIELDS = [
+    ('attempt_id', 'id'),
+    ('session_id', 'session_id'),
+    ('username', 'session__user__username'),
+    ('grade_level', 'session__user__profile__grade_level'),
+    ('operation_type', 'exercise__operation_type'),
+    ('difficulty', 'exercise__difficulty__value'),
+    ('question', 'exercise__question'),
+    ('correct_answer', 'exercise__answer'),
+    ('user_answer', 'user_answer'),
+    ('is_correct', 'is_correct'),
+    ('time_taken_seconds', 'time_taken'),
+    ('position', 'position'),
+    ('created_at', 'created_at'),
+]
+
+COLUMNS = [column for column, _ in EXPORT_FIELDS]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_queryset(username=None, grade_level=None, date_from=None, date_to=None, operation_type=None):
+    """Devuelve las filas de los intentos que cumplen los filtros, en orden de id"""
+    attempts = ExerciseAttempt.objects.all()
+    if username:
+        attempts = attempts.filter(session__user__username=username)
+    if grade_level:
+        attempts = attempts.filter(session__user__profile__grade_level=grade_level)
+    if date_from:
+        attempts = attempts.filter(created_at__gte=_start_of_day(date_from))
+    if date_to:
+        attempts = attempts.filter(created_at__lt=_start_of_day(date_to + timedelta(days=1)))
+    if operation_type:
+        attempts = attempts.filter(exercise__operation_type=operation_type)
+    return attempts.order_by('pk').values_list(*[field for _, field in EXPORT_FIELDS])
+
+
+def _start_of_day(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def _serialize(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """Objeto con ``write`` que devuelve la línea en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+_csv_writer = csv.writer(_Echo())
+
+
+def _csv_line(row):
+    return _csv_writer.writerow([_serialize(value) for value in row])
+
+
+def _ndjson_line(row):
+    return json.dumps(dict(zip(COLUMNS, map(_serialize, row))), ensure_ascii=False) + '\n'
+
+
+# Formato -> (cabecera, función que convierte una fila en una línea)
+EXPORTERS = {
+    'csv': (_csv_line(COLUMNS), _csv_line),
+    'ndjson': ('', _ndjson_line),
+}
+
+
+def _next_chunk(rows, last_id):
+    # El id es la primera columna y las filas vienen ordenadas por él
+    return rows if last_id is None else rows.filter(pk__gt=last_id)
+
+
+def iter_chunks(rows):
+    """Genera las filas en listas de hasta ``CHUNK_SIZE``, una consulta por bloque"""
+    last_id = None
+    while True:
+        chunk = list(_next_chunk(rows, last_id)[:CHUNK_SIZE])
+        if chunk:
+            yield chunk
+        if len(chunk) < CHUNK_SIZE:
+            return
+        last_id = chunk[-1][0]
+
+
+async def aiter_chunks(rows):
+    """Versión asíncrona de ``iter_chunks``"""
+    last_id = None
+    while True:
+        chunk = [row async for row in _next_chunk(rows, last_id)[:CHUNK_SIZE]]
+        if chunk:
+            yield chunk
+        if len(chunk) < CHUNK_SIZE:
+            return
+        last_id = chunk[-1][0]
+
+
+def iter_export(rows, export_format):
+    """Genera la exportación en el formato pedido, un bloque de líneas cada vez"""
+    header, line = EXPORTERS[export_format]
+    if header:
+        yield header
+    for chunk in iter_chunks(rows):
+        yield ''.join(map(line, chunk))
+
+
+async def aiter_export(rows, export_format):
+    """Versión asíncrona de ``iter_export``, para ``StreamingHttpResponse`` con ASGI"""
+    header, line = EXPORTERS[export_format]
+    if header:
+        yield header
+    async for chunk in aiter_chunks(rows):
+        yield ''.join(map(line, chunk))
@@ -1,5 +1,7 @@
 from django import forms
-from .models import Category, DifficultyLevel
+
+from users.models import Profile
+from .models import Category, DifficultyLevel, Exercise
 
 class ExerciseConfigForm(forms.Form):
     """Formulario para configurar una sesión de ejercicios"""
@@ -9,6 +11,8 @@ class ExerciseConfigForm(forms.Form):
         ('subtraction', 'Resta'),
         ('multiplication', 'Multiplicación'),
         ('division', 'División'),
+        ('adaptive', 'Adaptativo (según tu rendimiento)'),
+        ('review', 'Repaso de ejercicios fallados'),
     ]
     
     NUMBER_OF_EXERCISES_CHOICES = [
@@ -51,4 +55,32 @@ class ExerciseAnswerForm(forms.Form):
         decimal_places=2,
         required=True,
         widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'autofocus': 'autofocus'})
-    )
\ No newline at end of file
+    )
+    # Posición del ejercicio respondido, para detectar reenvíos y respuestas atrasadas
+    position = forms.IntegerField(min_value=0, widget=forms.HiddenInput)
+
+class AttemptExportForm(forms.Form):
+    """Formulario con los filtros de la exportación de intentos"""
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'JSON por líneas'),
+    ]
+    
+    GRADE_LEVEL_CHOICES = [('', 'Todos los cursos')] + Profile._meta.get_field('grade_level').choices
+    
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    username = forms.CharField(required=False)
+    grade_level = forms.TypedChoiceField(choices=GRADE_LEVEL_CHOICES, coerce=int, empty_value=None, required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    operation_type = forms.ChoiceField(
+        choices=[('', 'Todas las operaciones')] + Exercise.OPERATION_CHOICES,
+        required=False
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError('La fecha inicial no puede ser posterior a la final.')
+        return cleaned_data
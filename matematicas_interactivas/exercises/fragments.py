@@ -0,0 +1,35 @@
+"""Versión por usuario de los fragmentos de plantilla cacheados del historial.
+
+Las filas de las sesiones finalizadas no cambian, así que se cachean con
+``{% cache %}`` bajo una clave que incluye la versión de los fragmentos del
+usuario y el id de la sesión. Las versiones funcionan como las del dashboard
+(``users.cache``): invalidar consiste en cambiar la versión, y los fragmentos
+antiguos dejan de leerse y caducan solos.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from users.cache import aget_user_version, bump_user_version
+
+FRAGMENT_CACHE_ALIAS = 'template_fragments'
+
+
+def _cache():
+    alias = FRAGMENT_CACHE_ALIAS if FRAGMENT_CACHE_ALIAS in settings.CACHES else 'default'
+    return caches[alias]
+
+
+async def aget_fragment_version(user_id):
+    """Devuelve la versión actual de los fragmentos de un usuario"""
+    return await aget_user_version(_cache(), 'fragments', user_id)
+
+
+def invalidate_fragments(user_id):
+    """Invalida los fragmentos de un usuario cambiando su versión"""
+    bump_user_version(_cache(), 'fragments', user_id)
+
+
+def invalidate_fragments_on_commit(user_id):
+    """Invalida los fragmentos cuando se confirme la transacción en curso"""
+    transaction.on_commit(lambda: invalidate_fragments(user_id))
@@ -0,0 +1,119 @@
+"""Motor vectorizado de generación de ejercicios.
+
+Genera K ejercicios de una vez con aritmética de arrays de NumPy, para
+cualquier mezcla de operaciones y niveles de dificultad. Mantiene las reglas
+de siempre: la resta se ordena para que el resultado no sea negativo y la
+división se construye a partir de un producto para que sea exacta.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+from .constants import OPERATION_TYPES
+
+ADDITION, SUBTRACTION, MULTIPLICATION, DIVISION = range(len(OPERATION_TYPES))
+
+# Rango de operandos por valor de dificultad: 1: Fácil, 2: Medio, 3: Difícil
+DIFFICULTY_RANGES = {
+    1: (1, 10),
+    2: (10, 50),
+    3: (50, 100),
+}
+
+
+def operand_range(difficulty_value):
+    """Devuelve el rango (mínimo, máximo) de los operandos para una dificultad"""
+    # Cualquier valor desconocido se trata como difícil
+    return DIFFICULTY_RANGES.get(difficulty_value, DIFFICULTY_RANGES[3])
+
+
+def _range_arrays(difficulty_values):
+    """Devuelve los arrays de mínimos y máximos para cada dificultad"""
+    values = np.asarray(difficulty_values, dtype=np.int64)
+    easy, medium, hard = DIFFICULTY_RANGES[1], DIFFICULTY_RANGES[2], DIFFICULTY_RANGES[3]
+    low = np.where(values == 1, easy[0], np.where(values == 2, medium[0], hard[0]))
+    high = np.where(values == 1, easy[1], np.where(values == 2, medium[1], hard[1]))
+    return low, high
+
+
+class ExerciseGenerator:
+    """Generador de lotes de ejercicios con un RNG que admite semilla"""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def generate_arrays(self, operation_types, difficulty_values, count):
+        """Genera los operandos y respuestas de ``count`` ejercicios como arrays.
+
+        ``operation_types`` puede ser una operación, ``'all'`` (una operación
+        aleatoria por ejercicio) o una secuencia de longitud ``count``.
+        ``difficulty_values`` puede ser un entero o una secuencia de longitud
+        ``count``.
+        """
+        if isinstance(operation_types, str):
+            if operation_types == 'all':
+                codes = self.rng.integers(0, len(OPERATION_TYPES), size=count)
+            else:
+                codes = np.full(count, OPERATION_TYPES.index(operation_types), dtype=np.int64)
+        else:
+            codes = np.array([OPERATION_TYPES.index(op_type) for op_type in operation_types], dtype=np.int64)
+
+        low, high = _range_arrays(np.broadcast_to(difficulty_values, (count,)))
+
+        # Un único sorteo por cada array de operandos
+        operand1 = self.rng.integers(low, high, endpoint=True)
+        operand2 = self.rng.integers(low, high, endpoint=True)
+
+        return build_arrays(codes, operand1, operand2)
+
+    def generate(self, operation_types, difficulty_values, count):
+        """Genera ``count`` ejercicios listos para guardarse en el banco"""
+        return to_exercises(*self.generate_arrays(operation_types, difficulty_values, count))
+
+
+def build_arrays(codes, operand1, operand2):
+    """Aplica las reglas de cada operación sobre arrays de operandos.
+
+    Devuelve ``(codes, operand1, operand2, answers)``, donde los operandos de
+    la resta ya vienen ordenados.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    operand1 = np.asarray(operand1, dtype=np.int64)
+    operand2 = np.asarray(operand2, dtype=np.int64)
+
+    # Asegurar que el resultado de la resta sea positivo
+    swap = (codes == SUBTRACTION) & (operand1 < operand2)
+    operand1, operand2 = np.where(swap, operand2, operand1), np.where(swap, operand1, operand2)
+
+    # La división se plantea como (a × b) ÷ a, así que la respuesta es b
+    answers = np.select(
+        [codes == ADDITION, codes == SUBTRACTION, codes == MULTIPLICATION],
+        [operand1 + operand2, operand1 - operand2, operand1 * operand2],
+        default=operand2,
+    )
+    return codes, operand1, operand2, answers
+
+
+def to_exercises(codes, operand1, operand2, answers):
+    """Convierte los arrays generados en diccionarios de ejercicio"""
+    exercises = []
+    for code, num1, num2, answer in zip(codes.tolist(), operand1.tolist(), operand2.tolist(), answers.tolist()):
+        if code == ADDITION:
+            question = f"{num1} + {num2}"
+        elif code == SUBTRACTION:
+            question = f"{num1} - {num2}"
+        elif code == MULTIPLICATION:
+            question = f"{num1} × {num2}"
+        else:
+            question = f"{num1 * num2} ÷ {num1}"
+        exercises.append({
+            'question': question,
+            'answer': Decimal(answer),
+            'operation_type': OPERATION_TYPES[code],
+            'operand1': num1,
+            'operand2': num2,
+        })
+    return exercises
+
+
+default_generator = ExerciseGenerator()
@@ -0,0 +1,179 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from exercises.bank import ensure_defaults
+from exercises.models import DifficultyLevel, Exercise, ExerciseSession
+from exercises.forms import ExerciseConfigForm
+from matematicas_interactivas.benchmarking import (
+    LatencyRecorder,
+    compare_to_baseline,
+    load_baseline,
+    save_baseline,
+    throwaway_database,
+)
+from matematicas_interactivas.metrics import metrics_snapshot, reset_metrics
+from users.activity import writer
+
+PASSWORD = 'clave-de-benchmark-123'
+
+# Cifrado rápido de contraseñas, para que el registro y el inicio de sesión
+# no queden dominados por el coste (intencionado) de PBKDF2
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula N estudiantes concurrentes que recorren el ciclo completo de una "
+        "sesión (registro, inicio de sesión, configuración, K ejercicios, "
+        "resultados e historial) sobre una base de datos desechable, e informa "
+        "del rendimiento, los percentiles de latencia y las consultas por petición"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=20, help="Estudiantes simulados.")
+        parser.add_argument('--concurrency', type=int, default=4, help="Estudiantes a la vez (hilos).")
+        parser.add_argument(
+            '--exercises', type=int, default=10,
+            choices=[value for value, _ in ExerciseConfigForm.NUMBER_OF_EXERCISES_CHOICES],
+            help="Ejercicios por sesión.",
+        )
+        parser.add_argument('--difficulty', type=int, default=1, choices=[1, 2, 3])
+        parser.add_argument(
+            '--real-hasher', action='store_true',
+            help="Usar el cifrado de contraseñas configurado en lugar de uno rápido.",
+        )
+        parser.add_argument('--save-baseline', metavar='NOMBRE', help="Guardar los resultados como línea base.")
+        parser.add_argument('--compare', metavar='NOMBRE', help="Comparar con una línea base guardada.")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help="Empeoramiento admitido respecto a la línea base (0.2 = 20 %%).",
+        )
+        parser.add_argument('--json', action='store_true', help="Mostrar los resultados en JSON.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            baseline = load_baseline(options['compare'])
+            if baseline is None:
+                raise CommandError(f"No existe la línea base '{options['compare']}'.")
+
+        hashers = {} if options['real_hasher'] else {'PASSWORD_HASHERS': FAST_HASHERS}
+        if options['verbosity'] < 2:
+            # Sin una línea de log por cada petición simulada
+            logging.getLogger('matematicas_interactivas.metrics').setLevel(logging.WARNING)
+        with throwaway_database(), override_settings(**hashers):
+            results = self.run_benchmark(options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+        else:
+            self.print_results(results)
+
+        if options['save_baseline']:
+            path = save_baseline(options['save_baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {path}"))
+
+        if baseline is not None:
+            regressions = compare_to_baseline(results, baseline, options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f"Regresión en {regression['step']}: {regression['metric']} "
+                    f"{regression['baseline']} -> {regression['current']}"
+                ))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regresiones respecto a '{options['compare']}'.")
+            self.stdout.write(self.style.SUCCESS(f"Sin regresiones respecto a '{options['compare']}'."))
+
+    def run_benchmark(self, options):
+        ensure_defaults()
+        difficulty = DifficultyLevel.objects.get(value=options['difficulty'])
+        recorder = LatencyRecorder()
+        reset_metrics()
+
+        def run(index):
+            try:
+                self.run_student(index, difficulty, options['exercises'], recorder)
+            finally:
+                connection.close()
+
+        recorder.start()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            # list() hace que se propaguen las excepciones de los hilos
+            list(executor.map(run, range(options['students'])))
+        recorder.stop()
+
+        # Guardar los registros de actividad pendientes antes de borrar la base de datos
+        writer.stop()
+
+        queries = {name: view['avg_queries'] for name, view in metrics_snapshot().items()}
+        results = recorder.summary(queries)
+        results['config'] = {
+            key: options[key] for key in ('students', 'concurrency', 'exercises', 'difficulty', 'real_hasher')
+        }
+        return results
+
+    def run_student(self, index, difficulty, number_of_exercises, recorder):
+        """Recorre el ciclo completo de una sesión como un estudiante"""
+        client = Client()
+        username = f'estudiante{index}'
+
+        with recorder.measure('register'):
+            client.post(reverse('register'), {
+                'username': username,
+                'email': f'{username}@example.com',
+                'first_name': 'Estudiante',
+                'last_name': str(index),
+                'password1': PASSWORD,
+                'password2': PASSWORD,
+            })
+        with recorder.measure('login'):
+            client.post(reverse('login'), {'username': username, 'password': PASSWORD})
+
+        with recorder.measure('exercise_config'):
+            client.post(reverse('exercise_config'), {
+                'difficulty': difficulty.id,
+                'operation_type': 'all',
+                'number_of_exercises': number_of_exercises,
+            })
+
+        # Las respuestas se consultan fuera de la medición
+        session = ExerciseSession.objects.filter(user__username=username).latest('start_time')
+        answers = dict(Exercise.objects.filter(id__in=session.exercise_ids).values_list('id', 'answer'))
+
+        for position, exercise_id in enumerate(session.exercise_ids):
+            with recorder.measure('exercise_solve'):
+                client.get(reverse('exercise_solve'))
+            with recorder.measure('exercise_solve'):
+                client.post(reverse('exercise_solve'), {'answer': answers[exercise_id], 'position': position})
+        # La última visita finaliza la sesión
+        with recorder.measure('exercise_solve'):
+            client.get(reverse('exercise_solve'))
+
+        with recorder.measure('exercise_results'):
+            client.get(reverse('exercise_results', args=[session.id]))
+        with recorder.measure('exercise_history'):
+            client.get(reverse('exercise_history'))
+
+    def print_results(self, results):
+        config = results['config']
+        self.stdout.write(
+            f"{config['students']} estudiantes, {config['concurrency']} a la vez, "
+            f"{config['exercises']} ejercicios por sesión"
+        )
+        self.stdout.write(
+            f"{results['requests']} peticiones en {results['elapsed_s']} s "
+            f"({results['throughput_rps']} peticiones/s)\n"
+        )
+        self.stdout.write(f"{'Paso':<20}{'Peticiones':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Consultas':>12}")
+        for step, stats in results['steps'].items():
+            queries = '-' if stats['avg_queries'] is None else stats['avg_queries']
+            self.stdout.write(
+                f"{step:<20}{stats['requests']:>12}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                f"{stats['p99_ms']:>10}{queries:>12}"
+            )
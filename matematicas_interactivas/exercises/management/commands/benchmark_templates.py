@@ -0,0 +1,126 @@
+import copy
+import json
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from exercises.bank import ensure_defaults
+from exercises.models import DifficultyLevel
+from exercises.sample_data import create_practice_session
+from matematicas_interactivas.benchmarking import LatencyRecorder, throwaway_database
+from matematicas_interactivas.metrics import metrics_snapshot, reset_metrics
+
+PAGES = ['dashboard', 'exercise_history', 'exercise_results']
+
+# Cargadores sin caché: cada petición vuelve a leer y compilar las plantillas
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def _uncached_templates():
+    templates = copy.deepcopy(settings.TEMPLATES)
+    for template in templates:
+        template['OPTIONS']['loaders'] = UNCACHED_LOADERS
+    return templates
+
+
+def _without_fragment_cache():
+    caches = copy.deepcopy(settings.CACHES)
+    caches['template_fragments'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    return caches
+
+
+PROFILES = {
+    'sin_cache': lambda: {'TEMPLATES': _uncached_templates(), 'CACHES': _without_fragment_cache()},
+    'con_cache': lambda: {},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de renderizado de plantillas del dashboard, el historial y "
+        "los resultados de una sesión, sin y con el cargador de plantillas en caché "
+        "y los fragmentos cacheados, sobre una base de datos desechable"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Peticiones medidas por página.")
+        parser.add_argument('--sessions', type=int, default=20, help="Sesiones finalizadas del estudiante.")
+        parser.add_argument('--exercises', type=int, default=20, help="Ejercicios por sesión.")
+        parser.add_argument(
+            '--profile', action='append', dest='profiles', choices=list(PROFILES),
+            help="Configuración a medir (repetible). Por defecto, ambas.",
+        )
+        parser.add_argument('--json', action='store_true', help="Mostrar los resultados en JSON.")
+
+    def handle(self, *args, **options):
+        if options['verbosity'] < 2:
+            # Sin una línea de log por cada petición simulada
+            logging.getLogger('matematicas_interactivas.metrics').setLevel(logging.WARNING)
+
+        results = {}
+        with throwaway_database():
+            user, session = self.create_history(options['sessions'], options['exercises'])
+            urls = {
+                'dashboard': reverse('dashboard'),
+                'exercise_history': reverse('exercise_history'),
+                'exercise_results': reverse('exercise_results', args=[session.id]),
+            }
+            for name in options['profiles'] or PROFILES:
+                with override_settings(**PROFILES[name]()):
+                    results[name] = self.run_profile(user, urls, options['requests'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        self.stdout.write(f"{options['requests']} peticiones por página, {options['sessions']} sesiones\n")
+        self.stdout.write(f"{'Configuración':<16}{'Página':<20}{'Plantillas ms':>15}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, pages in results.items():
+            for page, stats in pages.items():
+                self.stdout.write(
+                    f"{name:<16}{page:<20}{stats['avg_template_ms']:>15}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                )
+
+    def create_history(self, sessions, exercises):
+        """Crea un estudiante con ``sessions`` sesiones finalizadas de ``exercises`` intentos"""
+        ensure_defaults()
+        difficulty = DifficultyLevel.objects.get(value=2)
+        user = User.objects.create_user('estudiante')
+        for index in range(sessions):
+            session = create_practice_session(
+                user, difficulty, exercises, seed=index, correct=index % (exercises + 1), finished=True,
+            )
+        return user, session
+
+    def run_profile(self, user, urls, requests):
+        """Pide cada página ``requests`` veces, tras una petición de calentamiento"""
+        client = Client()
+        client.force_login(user)
+        recorder = LatencyRecorder()
+        for url in urls.values():
+            client.get(url)
+
+        reset_metrics()
+        recorder.start()
+        for page, url in urls.items():
+            for _ in range(requests):
+                with recorder.measure(page):
+                    client.get(url)
+        recorder.stop()
+
+        template_times = {name: view['avg_template_ms'] for name, view in metrics_snapshot().items()}
+        summary = recorder.summary()
+        return {
+            page: {
+                'avg_template_ms': template_times.get(page),
+                'p50_ms': stats['p50_ms'],
+                'p95_ms': stats['p95_ms'],
+            }
+            for page, stats in summary['steps'].items()
+        }
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+
+from exercises.bank import ensure_defaults
+from exercises.models import DifficultyLevel, Exercise
+from exercises.sample_data import create_practice_session
+from exercises.services import record_attempt
+from matematicas_interactivas.benchmarking import throwaway_database
+from matematicas_interactivas.database import DEFAULT_SQLITE_PRAGMAS
+from matematicas_interactivas.metrics import percentile
+
+# Configuración de SQLite sin ajustar: los valores por defecto de SQLite y de Django
+UNTUNED_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+}
+
+PROFILES = {
+    'sin_ajustes': {'pragmas': UNTUNED_PRAGMAS, 'transaction_mode': None},
+    'con_ajustes': {'pragmas': DEFAULT_SQLITE_PRAGMAS, 'transaction_mode': 'IMMEDIATE'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el rendimiento de escritura concurrente (intentos de ejercicio con "
+        "sus contadores) sobre una base de datos SQLite desechable, sin y con los "
+        "ajustes de matematicas_interactivas.database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help="Hilos escribiendo a la vez.")
+        parser.add_argument('--writes', type=int, default=100, help="Intentos registrados por hilo.")
+        parser.add_argument(
+            '--profile', action='append', dest='profiles', choices=list(PROFILES),
+            help="Configuración a medir (repetible). Por defecto, ambas.",
+        )
+        parser.add_argument('--json', action='store_true', help="Mostrar los resultados en JSON.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Este benchmark solo tiene sentido con SQLite.")
+
+        results = {}
+        with throwaway_database():
+            sessions = self.create_sessions(options['writers'], options['writes'])
+            for name in options['profiles'] or PROFILES:
+                results[name] = self.run_profile(PROFILES[name], sessions, options['writes'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        self.stdout.write(f"{options['writers']} hilos, {options['writes']} intentos por hilo\n")
+        self.stdout.write(f"{'Configuración':<16}{'Escrituras/s':>14}{'p50 ms':>10}{'p95 ms':>10}{'Bloqueos':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<16}{result['writes_per_second']:>14}{result['p50_ms']:>10}"
+                f"{result['p95_ms']:>10}{result['locked_errors']:>10}"
+            )
+
+    def create_sessions(self, writers, writes):
+        """Crea un usuario con una sesión de ``writes`` ejercicios por hilo"""
+        ensure_defaults()
+        difficulty = DifficultyLevel.objects.get(value=2)
+        sessions = []
+        for index in range(writers):
+            user = User.objects.create_user(f'escritor{index}')
+            sessions.append(create_practice_session(user, difficulty, writes, seed=index, attempts=False))
+        return sessions
+
+    def run_profile(self, profile, sessions, writes):
+        """Registra ``writes`` intentos por sesión, cada sesión en su hilo"""
+        # Cada perfil empieza con las sesiones vacías
+        for session in sessions:
+            session.attempts.all().delete()
+
+        # Las conexiones nuevas toman los PRAGMA y el modo de transacción del perfil
+        connections.close_all()
+        connections.settings['default'].setdefault('OPTIONS', {})['transaction_mode'] = profile['transaction_mode']
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def write(session):
+            exercises = Exercise.objects.in_bulk(session.exercise_ids)
+            try:
+                for position, exercise_id in enumerate(session.exercise_ids):
+                    start = time.perf_counter()
+                    try:
+                        record_attempt(session, exercises[exercise_id], exercises[exercise_id].answer,
+                                       timedelta(seconds=3), position=position)
+                    except OperationalError:
+                        with lock:
+                            errors.append(position)
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+
+        with override_settings(SQLITE_PRAGMAS=profile['pragmas']):
+            # El modo de journal se guarda en el archivo y cambiarlo exige que no
+            # haya otras conexiones abiertas: se aplica una vez, antes de los hilos
+            connection.ensure_connection()
+            connection.close()
+
+        pragmas = {name: value for name, value in profile['pragmas'].items() if name != 'journal_mode'}
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            threads = [threading.Thread(target=write, args=(session,)) for session in sessions]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        connections.close_all()
+
+        return {
+            'writes': len(latencies),
+            'elapsed_s': round(elapsed, 3),
+            'writes_per_second': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'locked_errors': len(errors),
+        }
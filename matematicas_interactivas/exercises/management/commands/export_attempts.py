@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exercises.export import EXPORTERS, export_queryset, iter_export
+from exercises.constants import OPERATION_TYPES
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta los intentos de ejercicios en CSV o JSON por líneas, leyendo y "
+        "escribiendo por bloques para que la memoria no dependa del tamaño"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORTERS), default='csv')
+        parser.add_argument('--output', '-o', help="Archivo de salida. Por defecto, la salida estándar.")
+        parser.add_argument('--user', dest='username', help="Solo los intentos de este usuario.")
+        parser.add_argument(
+            '--grade', dest='grade_level', type=int,
+            choices=[value for value, _ in Profile._meta.get_field('grade_level').choices],
+        )
+        parser.add_argument('--from', dest='date_from', type=date.fromisoformat, help="Fecha inicial (AAAA-MM-DD).")
+        parser.add_argument('--to', dest='date_to', type=date.fromisoformat, help="Fecha final, incluida (AAAA-MM-DD).")
+        parser.add_argument('--operation', dest='operation_type', choices=OPERATION_TYPES)
+
+    def handle(self, *args, **options):
+        if options['date_from'] and options['date_to'] and options['date_from'] > options['date_to']:
+            raise CommandError("La fecha inicial no puede ser posterior a la final.")
+
+        rows = export_queryset(
+            username=options['username'],
+            grade_level=options['grade_level'],
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+            operation_type=options['operation_type'],
+        )
+        lines = iter_export(rows, options['format'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
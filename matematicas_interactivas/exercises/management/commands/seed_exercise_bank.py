@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exercises.bank import OPERATION_TYPES, ensure_defaults, fill_exercise_bank
+from exercises.models import Category, DifficultyLevel
+
+
+class Command(BaseCommand):
+    help = "Rellena el banco de ejercicios con todas las combinaciones de operandos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--difficulty', type=int, action='append', dest='difficulties',
+            help="Valor del nivel de dificultad a cargar (se puede repetir). Por defecto, todos.",
+        )
+        parser.add_argument(
+            '--operation', choices=OPERATION_TYPES, action='append', dest='operations',
+            help="Tipo de operación a cargar (se puede repetir). Por defecto, todas.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        ensure_defaults()
+        category = Category.objects.order_by('id').first()
+
+        levels = DifficultyLevel.objects.order_by('value')
+        if options['difficulties']:
+            levels = levels.filter(value__in=options['difficulties'])
+        if not levels:
+            raise CommandError("No hay niveles de dificultad que coincidan.")
+
+        for level in levels:
+            total = fill_exercise_bank(
+                level,
+                operation_types=options['operations'],
+                category=category,
+                batch_size=options['batch_size'],
+            )
+            self.stdout.write(f"{level.name}: {total} ejercicios en el banco")
+
+        self.stdout.write(self.style.SUCCESS("Banco de ejercicios actualizado."))
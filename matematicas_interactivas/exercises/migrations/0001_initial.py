@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='DifficultyLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('description', models.TextField(blank=True)),
+                ('value', models.IntegerField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Exercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation_type', models.CharField(choices=[('addition', 'Suma'), ('subtraction', 'Resta'), ('multiplication', 'Multiplicación'), ('division', 'División')], max_length=20)),
+                ('question', models.CharField(max_length=255)),
+                ('answer', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('operand1', models.IntegerField()),
+                ('operand2', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercises', to='exercises.category')),
+                ('difficulty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercises', to='exercises.difficultylevel')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExerciseSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(auto_now_add=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('total_exercises', models.IntegerField(default=0)),
+                ('correct_answers', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='exercises.category')),
+                ('difficulty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='exercises.difficultylevel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExerciseAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_answer', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_correct', models.BooleanField(default=False)),
+                ('time_taken', models.DurationField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='exercises.exercise')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='exercises.exercisesession')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='exercise',
+            constraint=models.UniqueConstraint(fields=('operation_type', 'difficulty', 'operand1', 'operand2'), name='unique_exercise_operands'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercisesession',
+            name='exercise_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
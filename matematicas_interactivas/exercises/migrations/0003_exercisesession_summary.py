@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0002_exercisesession_exercise_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercisesession',
+            name='final_accuracy',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='exercisesession',
+            name='final_duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='exercisesession',
+            index=models.Index(fields=['user', '-start_time'], name='session_user_start_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0003_exercisesession_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exerciseattempt',
+            name='position',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='exerciseattempt',
+            constraint=models.UniqueConstraint(fields=('session', 'position'), name='unique_attempt_position'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0004_exerciseattempt_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercisesession',
+            name='adaptive',
+            field=models.BooleanField(default=False),
+        ),
+    ]
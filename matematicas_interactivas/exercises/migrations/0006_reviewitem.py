@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0005_exercisesession_adaptive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField()),
+                ('interval', models.DurationField()),
+                ('ease', models.FloatField(default=2.5)),
+                ('repetitions', models.PositiveIntegerField(default=0)),
+                ('lapses', models.PositiveIntegerField(default=0)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_items', to='exercises.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'due_at'], name='review_user_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'exercise'), name='unique_review_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0006_reviewitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # El índice compuesto se crea antes de quitar el de la clave foránea
+        migrations.AddIndex(
+            model_name='exerciseattempt',
+            index=models.Index(fields=['session', 'created_at'], name='attempt_session_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='exerciseattempt',
+            name='session',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='exercises.exercisesession'),
+        ),
+        migrations.AlterField(
+            model_name='exercisesession',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='exercise_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0007_attempt_session_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exerciseattempt',
+            index=models.Index(fields=['created_at'], name='attempt_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercisesession',
+            index=models.Index(fields=['start_time'], name='session_start_idx'),
+        ),
+    ]
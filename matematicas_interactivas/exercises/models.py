@@ -1,7 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from .fragments import invalidate_fragments_on_commit
+
 class Category(models.Model):
     """Modelo para categorías de ejercicios matemáticos"""
     name = models.CharField(max_length=100)
@@ -36,48 +40,134 @@ class Exercise(models.Model):
     operation_type = models.CharField(max_length=20, choices=OPERATION_CHOICES)
     question = models.CharField(max_length=255)
     answer = models.DecimalField(max_digits=10, decimal_places=2)
+    operand1 = models.IntegerField()
+    operand2 = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        constraints = [
+            # Un ejercicio del banco es único por operación, dificultad y operandos
+            models.UniqueConstraint(
+                fields=['operation_type', 'difficulty', 'operand1', 'operand2'],
+                name='unique_exercise_operands',
+            ),
+        ]
+    
     def __str__(self):
         return f"{self.question} = {self.answer}"
 
 class ExerciseSession(models.Model):
     """Modelo para sesiones de ejercicios"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_sessions')
+    # Sin índice propio: lo cubre session_user_start_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_sessions', db_index=False)
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
     total_exercises = models.IntegerField(default=0)
     correct_answers = models.IntegerField(default=0)
     difficulty = models.ForeignKey(DifficultyLevel, on_delete=models.SET_NULL, null=True, related_name='sessions')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='sessions')
+    exercise_ids = models.JSONField(default=list, blank=True)  # Ejercicios de la sesión, en orden
+    adaptive = models.BooleanField(default=False)  # Los ejercicios se eligen uno a uno según el rendimiento
+    
+    # Resumen guardado al finalizar la sesión
+    final_accuracy = models.FloatField(null=True, blank=True)
+    final_duration = models.DurationField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Historial de un usuario ordenado por fecha (paginación por cursor)
+            models.Index(fields=['user', '-start_time'], name='session_user_start_idx'),
+            # Navegación por fechas del admin
+            models.Index(fields=['start_time'], name='session_start_idx'),
+        ]
     
     def __str__(self):
         return f"Sesión de {self.user.username} - {self.start_time.strftime('%d/%m/%Y %H:%M')}"
     
     def duration(self):
         """Calcula la duración de la sesión"""
+        if self.final_duration is not None:
+            return self.final_duration
         if self.end_time:
             return self.end_time - self.start_time
         return timezone.now() - self.start_time
     
     def accuracy(self):
         """Calcula el porcentaje de precisión"""
+        if self.final_accuracy is not None:
+            return self.final_accuracy
         if self.total_exercises == 0:
             return 0
         return round((self.correct_answers / self.total_exercises) * 100, 2)
     
+    FINISH_FIELDS = ['end_time', 'final_accuracy', 'final_duration']
+    
+    def finish(self):
+        """Finaliza la sesión guardando su precisión y duración"""
+        self.end_time = timezone.now()
+        self.final_accuracy = self.accuracy()
+        self.final_duration = self.end_time - self.start_time
+        self.save(update_fields=self.FINISH_FIELDS)
+    
     def is_active(self):
         """Verifica si la sesión está activa"""
         return self.end_time is None
 
 class ExerciseAttempt(models.Model):
     """Modelo para intentos de resolución de ejercicios"""
-    session = models.ForeignKey(ExerciseSession, on_delete=models.CASCADE, related_name='attempts')
+    # Sin índice propio: lo cubren attempt_session_created_idx y unique_attempt_position
+    session = models.ForeignKey(ExerciseSession, on_delete=models.CASCADE, related_name='attempts', db_index=False)
     exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='attempts')
+    position = models.PositiveIntegerField(null=True, blank=True)  # Posición del ejercicio en la sesión
     user_answer = models.DecimalField(max_digits=10, decimal_places=2)
     is_correct = models.BooleanField(default=False)
     time_taken = models.DurationField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        constraints = [
+            # Un único intento por ejercicio de la sesión, aunque lleguen envíos duplicados
+            models.UniqueConstraint(fields=['session', 'position'], name='unique_attempt_position'),
+        ]
+        indexes = [
+            # Intentos de una sesión en orden (resultados de la sesión)
+            models.Index(fields=['session', 'created_at'], name='attempt_session_created_idx'),
+            # Navegación por fechas del admin
+            models.Index(fields=['created_at'], name='attempt_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Intento de {self.session.user.username} - {self.exercise.question}"
+
+class ReviewItem(models.Model):
+    """Modelo para el repaso espaciado de los ejercicios fallados"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_items')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='review_items')
+    due_at = models.DateTimeField()  # Momento a partir del cual toca repasarlo
+    interval = models.DurationField()  # Espera hasta el siguiente repaso
+    ease = models.FloatField(default=2.5)  # Factor de crecimiento del intervalo
+    repetitions = models.PositiveIntegerField(default=0)  # Aciertos seguidos desde el último fallo
+    lapses = models.PositiveIntegerField(default=0)  # Veces que se ha fallado
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'exercise'], name='unique_review_item'),
+        ]
+        indexes = [
+            # Ejercicios pendientes de un usuario: un único recorrido por rango
+            models.Index(fields=['user', 'due_at'], name='review_user_due_idx'),
+        ]
+    
     def __str__(self):
-        return f"Intento de {self.session.user.username} - {self.exercise.question}"
\ No newline at end of file
+        return f"Repaso de {self.user.username} - {self.exercise.question}"
+
+# Las filas de las sesiones finalizadas se cachean en el historial: si una se
+# modifica después (por ejemplo, desde el admin), se invalidan las del usuario
+@receiver(post_save, sender=ExerciseSession)
+def invalidate_history_fragments(sender, instance, created, update_fields=None, **kwargs):
+    if created or instance.end_time is None:
+        return
+    # Al finalizar, la fila aún no estaba cacheada
+    if update_fields is not None and set(update_fields) <= set(ExerciseSession.FINISH_FIELDS):
+        return
+    invalidate_fragments_on_commit(instance.user_id)
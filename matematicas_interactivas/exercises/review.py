@@ -0,0 +1,83 @@
+"""Repaso espaciado de los ejercicios fallados.
+
+Cada fallo programa (o reprograma) el ejercicio en ``ReviewItem``. Cada
+acierto en un repaso pendiente alarga la espera multiplicándola por su
+factor de facilidad, y un nuevo fallo la reinicia. Los pendientes de un
+usuario se obtienen con un único recorrido del índice (user, due_at).
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ReviewItem
+
+# Espera tras un fallo y tras el primer acierto posterior
+FIRST_INTERVAL = timedelta(minutes=10)
+SECOND_INTERVAL = timedelta(days=1)
+
+# Cada fallo reduce el factor de facilidad, sin bajar del mínimo
+MIN_EASE = 1.3
+EASE_PENALTY = 0.2
+
+# A partir de esta espera el ejercicio se da por aprendido y sale del repaso
+MASTERED_INTERVAL = timedelta(days=60)
+
+
+def _schedule_lapse(item, now):
+    item.lapses += 1
+    item.repetitions = 0
+    item.ease = max(MIN_EASE, item.ease - EASE_PENALTY)
+    item.interval = FIRST_INTERVAL
+    item.due_at = now + FIRST_INTERVAL
+    item.save(update_fields=['lapses', 'repetitions', 'ease', 'interval', 'due_at'])
+    return item
+
+
+def schedule_review(user_id, exercise_id, is_correct, now=None):
+    """Actualiza el repaso de un ejercicio tras un intento.
+
+    Devuelve el ``ReviewItem`` actualizado, o ``None`` si el ejercicio no
+    está (o ha dejado de estar) en repaso.
+    """
+    now = now or timezone.now()
+    item = ReviewItem.objects.filter(user_id=user_id, exercise_id=exercise_id).first()
+
+    if is_correct:
+        # Solo cuentan los aciertos en repasos que ya tocaban
+        if item is None or item.due_at > now:
+            return item
+        interval = SECOND_INTERVAL if item.repetitions == 0 else item.interval * item.ease
+        if interval > MASTERED_INTERVAL:
+            item.delete()
+            return None
+        item.repetitions += 1
+        item.interval = interval
+        item.due_at = now + interval
+        item.save(update_fields=['repetitions', 'interval', 'due_at'])
+        return item
+
+    if item is None:
+        try:
+            with transaction.atomic():
+                return ReviewItem.objects.create(
+                    user_id=user_id,
+                    exercise_id=exercise_id,
+                    due_at=now + FIRST_INTERVAL,
+                    interval=FIRST_INTERVAL,
+                    lapses=1,
+                )
+        except IntegrityError:
+            # Otra petición lo creó a la vez
+            item = ReviewItem.objects.get(user_id=user_id, exercise_id=exercise_id)
+    return _schedule_lapse(item, now)
+
+
+def due_exercise_ids(user_id, limit, now=None):
+    """Devuelve los ids de hasta ``limit`` ejercicios pendientes, los más atrasados primero"""
+    now = now or timezone.now()
+    return list(
+        ReviewItem.objects.filter(user_id=user_id, due_at__lte=now)
+        .order_by('due_at')
+        .values_list('exercise_id', flat=True)[:limit]
+    )
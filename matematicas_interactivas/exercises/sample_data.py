@@ -0,0 +1,40 @@
+"""Sesiones de ejemplo con ejercicios del banco, para las pruebas y los benchmarks."""
+from datetime import timedelta
+from decimal import Decimal
+
+from .bank import get_bank_exercise_ids
+from .generator import ExerciseGenerator
+from .models import ExerciseAttempt, ExerciseSession
+
+
+def create_practice_session(user, difficulty_level, size, seed=0, correct=0, attempts=True, finished=False):
+    """Crea una sesión de ``size`` ejercicios del banco para ``user``.
+
+    Con ``attempts`` se guarda un intento por ejercicio con ``bulk_create``,
+    de los que los ``correct`` primeros son correctos; con ``finished`` la
+    sesión queda finalizada.
+    """
+    exercises_data = ExerciseGenerator(seed=seed).generate('all', difficulty_level.value, size)
+    exercise_ids = get_bank_exercise_ids(exercises_data, difficulty_level)
+    session = ExerciseSession.objects.create(
+        user=user,
+        total_exercises=size,
+        difficulty=difficulty_level,
+        exercise_ids=exercise_ids,
+        correct_answers=correct if attempts else 0,
+    )
+    if attempts:
+        ExerciseAttempt.objects.bulk_create([
+            ExerciseAttempt(
+                session=session,
+                exercise_id=exercise_id,
+                user_answer=Decimal('1'),
+                is_correct=position < correct,
+                time_taken=timedelta(seconds=4),
+                position=position,
+            )
+            for position, exercise_id in enumerate(exercise_ids)
+        ])
+    if finished:
+        session.finish()
+    return session
@@ -0,0 +1,133 @@
+"""Operaciones de escritura del flujo de ejercicios."""
+import time
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.activity import log_activity
+from users.models import OperationStats, Progress
+from .adaptive import next_exercise_id, record_result
+from .models import ExerciseAttempt, ExerciseSession
+from .review import schedule_review
+from .state import advance_state, claim_position, clear_state
+
+
+def record_attempt(session, exercise, user_answer, time_taken, position=None):
+    """Registra un intento y actualiza la sesión y el progreso del usuario.
+
+    Los contadores, incluidas las estadísticas por operación, se incrementan
+    con expresiones ``F()`` dentro de la misma transacción que el intento, así
+    que el coste es constante y dos peticiones simultáneas no se pisan entre
+    sí. También programa el repaso del ejercicio si se ha fallado, o lo
+    reprograma si era un repaso, y actualiza las estadísticas adaptativas
+    del usuario aunque la sesión no sea adaptativa. Si ya existe un intento
+    para ``position`` en la sesión, lanza ``IntegrityError`` sin tocar los
+    contadores.
+    """
+    is_correct = user_answer == exercise.answer
+    correct = 1 if is_correct else 0
+
+    with transaction.atomic():
+        attempt = ExerciseAttempt.objects.create(
+            session=session,
+            exercise=exercise,
+            position=position,
+            user_answer=user_answer,
+            is_correct=is_correct,
+            time_taken=time_taken
+        )
+
+        if is_correct:
+            ExerciseSession.objects.filter(pk=session.pk).update(correct_answers=F('correct_answers') + 1)
+            session.correct_answers += 1
+
+        Progress.objects.filter(user_id=session.user_id).update(
+            total_exercises=F('total_exercises') + 1,
+            correct_answers=F('correct_answers') + correct,
+            total_time_spent=F('total_time_spent') + time_taken,
+            last_activity=timezone.now(),
+        )
+        update_operation_stats(session.user_id, exercise, correct, time_taken)
+        schedule_review(session.user_id, exercise.id, is_correct)
+
+    # Fuera de la transacción: la caché no se deshace si el intento falla
+    record_result(session.user_id, exercise.operation_type, is_correct, (time_taken or timedelta(0)).total_seconds())
+    return attempt
+
+
+def update_operation_stats(user_id, exercise, correct, time_taken):
+    """Suma un intento a las estadísticas de su operación, dificultad y categoría"""
+    lookup = {
+        'user_id': user_id,
+        'operation_type': exercise.operation_type,
+        'difficulty_id': exercise.difficulty_id,
+        'category_id': exercise.category_id,
+    }
+    increments = {
+        'attempts': F('attempts') + 1,
+        'correct': F('correct') + correct,
+        'total_time': F('total_time') + (time_taken or timedelta(0)),
+    }
+    if OperationStats.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        # Primer intento de esta combinación; si otra petición crea la fila
+        # a la vez, se suma sobre la suya
+        with transaction.atomic():
+            OperationStats.objects.create(**lookup, attempts=1, correct=correct, total_time=time_taken or timedelta(0))
+    except IntegrityError:
+        OperationStats.objects.filter(**lookup).update(**increments)
+
+
+def submit_answer(user, state, session, exercise, user_answer):
+    """Registra la respuesta al ejercicio actual y pasa al siguiente.
+
+    Devuelve el intento guardado, o ``None`` si otro envío para el mismo
+    ejercicio se adelantó.
+    """
+    # Reclamar el ejercicio actual; si otro envío se adelantó, ignorar este
+    if not claim_position(state):
+        return None
+
+    # Calcular tiempo tomado
+    time_taken = timedelta(seconds=int(time.time() - state['started_at']))
+
+    try:
+        attempt = record_attempt(session, exercise, user_answer, time_taken, position=state['position'])
+    except IntegrityError:
+        # El intento de esta posición ya estaba guardado: el estado en caché
+        # está atrasado (por ejemplo, lo guardó otro proceso), así que se
+        # descarta para reconstruirlo desde la base de datos
+        clear_state(user.id)
+        return None
+
+    if session.adaptive:
+        add_adaptive_exercise(user, session, attempt)
+
+    # Pasar al siguiente ejercicio (y reiniciar el tiempo)
+    advance_state(user.id, state)
+    return attempt
+
+
+def add_adaptive_exercise(user, session, attempt):
+    """Añade a la sesión adaptativa el siguiente ejercicio"""
+    if len(session.exercise_ids) < session.total_exercises:
+        # Solo llega aquí quien reclamó la posición, así que no hay escrituras simultáneas
+        session.exercise_ids.append(next_exercise_id(user.id))
+        session.save(update_fields=['exercise_ids'])
+
+
+def finish_session(user, session):
+    """Finaliza la sesión, registra la actividad y limpia su estado"""
+    # El progreso ya se actualizó con cada intento
+    session.finish()
+
+    log_activity(
+        user=user,
+        activity_type='fin_sesion_ejercicios',
+        description=f"Completó una sesión de ejercicios con {session.correct_answers}/{session.total_exercises} respuestas correctas"
+    )
+
+    clear_state(user.id)
@@ -0,0 +1,104 @@
+"""Estado de la sesión de ejercicios en curso.
+
+El estado es una estructura pequeña por usuario guardada en caché, en lugar
+de en ``request.session``, así que responder no cuesta una lectura y una
+escritura de la sesión de Django. Si la caché lo pierde, se reconstruye a
+partir de la base de datos.
+
+Para avanzar de un ejercicio al siguiente hay que reclamar antes la posición
+actual con ``cache.add``, que es atómico: si llegan dos envíos a la vez para
+el mismo ejercicio, solo uno de ellos cuenta.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import ExerciseSession
+
+STATE_TIMEOUT = 60 * 60 * 2
+CLAIM_TIMEOUT = 60
+
+
+def _cache():
+    return caches[getattr(settings, 'EXERCISE_STATE_CACHE_ALIAS', 'default')]
+
+
+def _state_key(user_id):
+    return f"exercise_state:{user_id}"
+
+
+def _claim_key(state):
+    return f"exercise_state:{state['session_id']}:{state['position']}"
+
+
+def start_state(user_id, session):
+    """Guarda el estado inicial de una sesión recién creada"""
+    state = {
+        'session_id': session.id,
+        'position': 0,
+        'total': session.total_exercises,
+        'started_at': time.time(),
+    }
+    _cache().set(_state_key(user_id), state, timeout=STATE_TIMEOUT)
+    return state
+
+
+def _active_sessions(user_id):
+    return ExerciseSession.objects.filter(user_id=user_id, end_time__isnull=True).order_by('-start_time')
+
+
+def _rebuilt_state(session, position):
+    return {
+        'session_id': session.id,
+        'position': position,
+        'total': session.total_exercises,
+        'started_at': time.time(),
+    }
+
+
+def get_state(user_id):
+    """Devuelve el estado de la sesión activa del usuario, o ``None`` si no hay"""
+    state = _cache().get(_state_key(user_id))
+    if state is not None:
+        return state
+
+    # Reconstruir el estado desde la base de datos
+    session = _active_sessions(user_id).first()
+    if session is None:
+        return None
+    state = _rebuilt_state(session, session.attempts.count())
+    _cache().set(_state_key(user_id), state, timeout=STATE_TIMEOUT)
+    return state
+
+
+async def aget_state(user_id):
+    """Versión asíncrona de ``get_state``"""
+    state = await _cache().aget(_state_key(user_id))
+    if state is not None:
+        return state
+
+    # Reconstruir el estado desde la base de datos
+    session = await _active_sessions(user_id).afirst()
+    if session is None:
+        return None
+    state = _rebuilt_state(session, await session.attempts.acount())
+    await _cache().aset(_state_key(user_id), state, timeout=STATE_TIMEOUT)
+    return state
+
+
+def claim_position(state):
+    """Reclama la posición actual; devuelve ``False`` si otro envío se adelantó"""
+    return _cache().add(_claim_key(state), True, timeout=CLAIM_TIMEOUT)
+
+
+def advance_state(user_id, state):
+    """Pasa al siguiente ejercicio tras reclamar la posición actual"""
+    state = dict(state, position=state['position'] + 1, started_at=time.time())
+    _cache().set(_state_key(user_id), state, timeout=STATE_TIMEOUT)
+    return state
+
+
+def clear_state(user_id):
+    """Elimina el estado al terminar la sesión"""
+    _cache().delete(_state_key(user_id))
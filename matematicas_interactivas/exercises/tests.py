@@ -1,3 +1,604 @@
-from django.test import TestCase
+import json
+import random
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from matematicas_interactivas.testing import QueryPlanAssertionsMixin
+from users.models import OperationStats, Progress
+
+from .adaptive import choose_next, get_stats, next_exercise_id, update_stats
+from .bank import ensure_defaults, get_bank_exercise_ids
+from .export import COLUMNS
+from .generator import OPERATION_TYPES, ExerciseGenerator
+from .models import DifficultyLevel, Exercise, ExerciseAttempt, ExerciseSession, ReviewItem
+from .sample_data import create_practice_session
+from .services import finish_session
+from .state import claim_position, get_state
+from .views import HISTORY_PAGE_SIZE
+
+
+class ExerciseGeneratorTests(SimpleTestCase):
+    """Pruebas del generador vectorizado de ejercicios"""
+
+    def test_same_seed_gives_same_exercises(self):
+        first = ExerciseGenerator(seed=7).generate('all', 2, 50)
+        second = ExerciseGenerator(seed=7).generate('all', 2, 50)
+        self.assertEqual(first, second)
+
+    def test_rules_hold_for_a_mixed_batch(self):
+        exercises = ExerciseGenerator(seed=1).generate('all', [1, 2, 3] * 1000, 3000)
+        for data in exercises:
+            num1, num2, answer = data['operand1'], data['operand2'], data['answer']
+            if data['operation_type'] == 'subtraction':
+                self.assertGreaterEqual(answer, 0)
+                self.assertEqual(data['question'], f"{num1} - {num2}")
+            elif data['operation_type'] == 'division':
+                self.assertEqual(data['question'], f"{num1 * num2} ÷ {num1}")
+                self.assertEqual(answer, num2)
+
+    def test_operands_respect_difficulty_range(self):
+        exercises = ExerciseGenerator(seed=3).generate('addition', 1, 500)
+        for data in exercises:
+            self.assertTrue(1 <= data['operand1'] <= 10)
+            self.assertTrue(1 <= data['operand2'] <= 10)
+
+
+class AdaptiveSchedulerTests(SimpleTestCase):
+    """Pruebas de la actualización de las estadísticas adaptativas"""
+
+    def new_stats(self, level=1):
+        return {
+            operation_type: {'accuracy': 0.7, 'seconds': None, 'level': level, 'attempts': 0}
+            for operation_type in OPERATION_TYPES
+        }
+
+    def test_level_goes_up_after_fast_correct_answers(self):
+        stats = self.new_stats()
+        for _ in range(3):
+            update_stats(stats, 'addition', True, 4)
+        self.assertEqual(stats['addition']['level'], 2)
+        self.assertEqual(stats['subtraction']['level'], 1)
+
+    def test_level_goes_down_after_wrong_answers(self):
+        stats = self.new_stats(level=3)
+        for _ in range(3):
+            update_stats(stats, 'division', False, 40)
+        self.assertEqual(stats['division']['level'], 2)
+
+    def test_weak_operations_are_chosen_more_often(self):
+        stats = self.new_stats()
+        stats['division']['accuracy'] = 0.0
+        for operation_type in ('addition', 'subtraction', 'multiplication'):
+            stats[operation_type]['accuracy'] = 1.0
+        rng = random.Random(0)
+        chosen = [choose_next(stats, rng)[0] for _ in range(200)]
+        self.assertGreater(chosen.count('division'), 100)
+
+
+class ExerciseBankTests(TestCase):
+    """El banco de ejercicios no duplica filas"""
+
+    def test_seeding_is_idempotent(self):
+        call_command('seed_exercise_bank', '--difficulty', '1', stdout=StringIO())
+        seeded = Exercise.objects.count()
+        self.assertGreater(seeded, 0)
+
+        call_command('seed_exercise_bank', '--difficulty', '1', stdout=StringIO())
+        self.assertEqual(Exercise.objects.count(), seeded)
+
+    def test_batch_ids_reuse_seeded_exercises(self):
+        call_command('seed_exercise_bank', '--difficulty', '1', stdout=StringIO())
+        seeded = Exercise.objects.count()
+        difficulty = DifficultyLevel.objects.get(value=1)
+        exercises_data = ExerciseGenerator(seed=7).generate('all', difficulty.value, 20)
+
+        first = get_bank_exercise_ids(exercises_data, difficulty)
+        self.assertEqual(first, get_bank_exercise_ids(exercises_data, difficulty))
+        self.assertEqual(Exercise.objects.count(), seeded)
+
+    def test_batch_with_more_than_a_thousand_keys(self):
+        ensure_defaults()
+        difficulty = DifficultyLevel.objects.get(value=3)
+        exercises_data = ExerciseGenerator(seed=3).generate('all', difficulty.value, 1500)
+        keys = {(data['operation_type'], data['operand1'], data['operand2']) for data in exercises_data}
+        self.assertGreater(len(keys), 1000)
+
+        ids = get_bank_exercise_ids(exercises_data, difficulty)
+        exercises = Exercise.objects.in_bulk(ids)
+        self.assertEqual(
+            [(exercises[pk].operation_type, exercises[pk].operand1, exercises[pk].operand2) for pk in ids],
+            [(data['operation_type'], data['operand1'], data['operand2']) for data in exercises_data],
+        )
+
+
+class HistoryPaginationTests(TestCase):
+    """El historial se pagina por cursor, de forma estable aunque coincidan las fechas"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.client.force_login(self.user)
+
+    def create_sessions(self, count, start_time):
+        ExerciseSession.objects.bulk_create([ExerciseSession(user=self.user) for _ in range(count)])
+        ExerciseSession.objects.filter(user=self.user).update(start_time=start_time)
+
+    def history(self, cursor=None):
+        params = {'cursor': cursor} if cursor is not None else {}
+        response = self.client.get(reverse('exercise_history'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['sessions']
+
+    def test_pages_follow_the_cursor_when_start_times_tie(self):
+        self.create_sessions(HISTORY_PAGE_SIZE + 5, timezone.now())
+
+        first = self.history()
+        self.assertEqual(len(first), HISTORY_PAGE_SIZE)
+        self.assertTrue(first.has_next)
+        second = self.history(first.next_cursor)
+        self.assertFalse(second.has_next)
+
+        ids = [session.id for session in first] + [session.id for session in second]
+        expected = list(ExerciseSession.objects.order_by('-pk').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_pages_are_ordered_by_start_time(self):
+        now = timezone.now()
+        self.create_sessions(3, now)
+        older = ExerciseSession.objects.order_by('pk').first()
+        ExerciseSession.objects.filter(pk=older.pk).update(start_time=now - timedelta(days=1))
+
+        self.assertEqual([session.id for session in self.history()][-1], older.id)
+
+    def test_invalid_cursor_shows_the_first_page(self):
+        self.create_sessions(3, timezone.now())
+        for cursor in ['no-es-un-cursor', 'bWFs', '']:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(len(self.history(cursor)), 3)
+
+
+class ExerciseResultsQueryTests(TestCase):
+    """El número de consultas de los resultados no depende del tamaño de la sesión"""
+
+    def setUp(self):
+        ensure_defaults()
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.difficulty = DifficultyLevel.objects.get(value=2)
+        self.client.force_login(self.user)
+
+    def create_session(self, size):
+        return create_practice_session(self.user, self.difficulty, size, seed=size, correct=size // 2, finished=True)
+
+    def count_results_queries(self, session):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('exercise_results', args=[session.id]))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        small = self.count_results_queries(self.create_session(5))
+        large = self.count_results_queries(self.create_session(500))
+        self.assertEqual(small, large)
+
+
+class AdminScalabilityTests(TestCase):
+    """Los listados del admin no hacen consultas por fila"""
+
+    def setUp(self):
+        ensure_defaults()
+        self.difficulty = DifficultyLevel.objects.get(value=2)
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'clave-segura-123')
+        self.client.force_login(admin_user)
+
+    def create_sessions(self, count, attempts=5):
+        sessions = []
+        for index in range(count):
+            user = User.objects.create_user(f'estudiante{User.objects.count()}')
+            sessions.append(create_practice_session(user, self.difficulty, attempts, seed=index))
+        return sessions
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_query_count_is_constant(self):
+        urls = [
+            reverse('admin:exercises_exercisesession_changelist'),
+            reverse('admin:exercises_exerciseattempt_changelist'),
+            reverse('admin:users_activitylog_changelist'),
+        ]
+        self.create_sessions(2)
+        small = [self.count_queries(url) for url in urls]
+        self.create_sessions(8)
+        self.assertEqual(small, [self.count_queries(url) for url in urls])
+
+    def test_session_attempts_are_paginated(self):
+        session = self.create_sessions(1, attempts=60)[0]
+        url = reverse('admin:exercises_exercisesession_change', args=[session.id])
+
+        response = self.client.get(url)
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(len(formset.forms), 50)
+        self.assertContains(response, '?intentos=2')
+
+        response = self.client.get(url, {'intentos': 2})
+        forms = response.context['inline_admin_formsets'][0].formset.forms
+        self.assertEqual([form.instance.position for form in forms], list(range(50, 60)))
+
+
+class HistoryFragmentCacheTests(TestCase):
+    """Las filas de las sesiones finalizadas del historial se cachean"""
+
+    def setUp(self):
+        caches['template_fragments'].clear()
+        ensure_defaults()
+        self.difficulty = DifficultyLevel.objects.get(value=2)
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.client.force_login(self.user)
+
+    def create_session(self, **kwargs):
+        return ExerciseSession.objects.create(
+            user=self.user, total_exercises=10, correct_answers=4, difficulty=self.difficulty, **kwargs
+        )
+
+    def history(self):
+        return self.client.get(reverse('exercise_history')).content.decode()
+
+    def test_finished_rows_are_cached_until_invalidated(self):
+        session = self.create_session(end_time=timezone.now(), final_accuracy=40.0)
+        self.assertIn('40.0%', self.history())
+
+        # Sin señales: la fila cacheada sigue mostrando el valor anterior
+        ExerciseSession.objects.filter(pk=session.pk).update(final_accuracy=90.0)
+        self.assertIn('40.0%', self.history())
+
+        # Guardar la sesión (por ejemplo, desde el admin) invalida las filas del usuario
+        with self.captureOnCommitCallbacks(execute=True):
+            session.refresh_from_db()
+            session.save()
+        self.assertIn('90.0%', self.history())
+
+    def test_active_rows_are_not_cached(self):
+        session = self.create_session()
+        self.assertIn('40.0%', self.history())
+        ExerciseSession.objects.filter(pk=session.pk).update(correct_answers=9)
+        self.assertIn('90.0%', self.history())
+
+    def test_finishing_keeps_the_cached_rows(self):
+        self.create_session(end_time=timezone.now(), final_accuracy=40.0)
+        self.history()
+        cached = len(caches['template_fragments']._cache)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_session().finish()
+        self.history()
+        # Solo se añade la fila de la sesión recién finalizada
+        self.assertEqual(len(caches['template_fragments']._cache), cached + 1)
+
+
+class AttemptExportTests(TestCase):
+    """Exportación de intentos en CSV y JSON por líneas"""
+
+    def setUp(self):
+        ensure_defaults()
+        self.difficulty = DifficultyLevel.objects.get(value=2)
+        self.student = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.teacher = User.objects.create_user('profesora', 'profesora@example.com', 'clave-segura-123', is_staff=True)
+        self.client.force_login(self.teacher)
+        self.async_client.force_login(self.teacher)
+
+    def create_attempts(self, size, seed=0):
+        return create_practice_session(self.student, self.difficulty, size, seed=seed)
+
+    def export(self, **params):
+        return b''.join(self.export_chunks(**params)).decode()
+
+    def export_chunks(self, **params):
+        return async_to_sync(self.aexport_chunks)(**params)
+
+    async def aexport_chunks(self, **params):
+        # Como la sirve ASGI: el contenido es un iterador asíncrono
+        response = await self.async_client.get(reverse('export_attempts'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        return [chunk async for chunk in response.streaming_content]
+
+    def test_csv_has_header_and_one_row_per_attempt(self):
+        self.create_attempts(5)
+        lines = self.export().splitlines()
+        self.assertEqual(lines[0].split(','), COLUMNS)
+        self.assertEqual(len(lines), 6)
+        self.assertIn('estudiante', lines[1])
+
+    def test_ndjson_rows_are_json(self):
+        session = self.create_attempts(3)
+        rows = [json.loads(line) for line in self.export(format='ndjson').splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['session_id'], session.id)
+        self.assertEqual(rows[0]['time_taken_seconds'], 4.0)
+        self.assertEqual([row['position'] for row in rows], [0, 1, 2])
+
+    def test_rows_are_streamed_in_keyset_chunks(self):
+        self.create_attempts(5)
+        with mock.patch('exercises.export.CHUNK_SIZE', 2):
+            chunks = self.export_chunks(format='ndjson')
+        self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [2, 2, 1])
+        ids = [json.loads(line)['attempt_id'] for line in b''.join(chunks).splitlines()]
+        self.assertEqual(ids, list(ExerciseAttempt.objects.order_by('pk').values_list('pk', flat=True)))
+
+    def test_filters_by_operation(self):
+        self.create_attempts(10)
+        expected = ExerciseAttempt.objects.filter(exercise__operation_type='addition').count()
+        rows = [json.loads(line) for line in self.export(format='ndjson', operation_type='addition').splitlines()]
+        self.assertEqual(len(rows), expected)
+        self.assertTrue(all(row['operation_type'] == 'addition' for row in rows))
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(reverse('export_attempts'), {'date_from': '2024-02-01', 'date_to': '2024-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_staff(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('export_attempts'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_query_count_is_constant(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.export()
+            return len(queries)
+
+        self.create_attempts(5)
+        small = count_queries()
+        self.create_attempts(200, seed=1)
+        self.assertEqual(small, count_queries())
+
+    def test_management_command(self):
+        self.create_attempts(4)
+        out = StringIO()
+        call_command('export_attempts', '--format', 'csv', '--user', 'estudiante', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+
+
+class QueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """Los accesos más frecuentes usan sus índices (EXPLAIN)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.session = ExerciseSession.objects.create(user=self.user)
+
+    def test_session_attempts_in_order(self):
+        self.assertUsesIndex(self.session.attempts.order_by('created_at'), 'attempt_session_created_idx')
+
+    def test_session_history(self):
+        sessions = ExerciseSession.objects.filter(user=self.user).order_by('-start_time')[:20]
+        self.assertUsesIndex(sessions, 'session_user_start_idx')
+
+    def test_due_reviews(self):
+        due = ReviewItem.objects.filter(user=self.user, due_at__lte=timezone.now()).order_by('due_at')
+        self.assertUsesIndex(due, 'review_user_due_idx')
+
+
+class ExerciseFlowTests(TestCase):
+    """Pruebas del flujo completo de una sesión de ejercicios"""
+
+    def setUp(self):
+        cache.clear()
+        ensure_defaults()
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.difficulty = DifficultyLevel.objects.get(value=1)
+        self.client.force_login(self.user)
+
+    def start_session(self, number_of_exercises=5):
+        self.client.post(reverse('exercise_config'), {
+            'difficulty': self.difficulty.id,
+            'operation_type': 'all',
+            'number_of_exercises': number_of_exercises,
+        })
+        return ExerciseSession.objects.get(user=self.user)
+
+    def test_session_state_is_kept_out_of_the_django_session(self):
+        session = self.start_session()
+        for position, exercise_id in enumerate(session.exercise_ids):
+            answer = Exercise.objects.get(id=exercise_id).answer
+            self.client.post(reverse('exercise_solve'), {'answer': answer, 'position': position})
+            self.assertNotIn('exercises_remaining', self.client.session)
+
+        response = self.client.get(reverse('exercise_solve'))
+        self.assertRedirects(response, reverse('exercise_results', args=[session.id]))
+        session.refresh_from_db()
+        self.assertEqual(session.correct_answers, 5)
+        self.assertIsNotNone(session.end_time)
+
+    def test_duplicate_submission_is_recorded_once(self):
+        self.start_session()
+        # Otro envío simultáneo ya reclamó el primer ejercicio
+        self.assertTrue(claim_position(get_state(self.user.id)))
+
+        self.client.post(reverse('exercise_solve'), {'answer': '1', 'position': 0})
+        self.assertFalse(ExerciseAttempt.objects.exists())
+        self.assertEqual(get_state(self.user.id)['position'], 0)
+
+    def test_answer_api_returns_verdict_and_next_exercise(self):
+        session = self.start_session()
+        first = Exercise.objects.get(id=session.exercise_ids[0])
+        second = Exercise.objects.get(id=session.exercise_ids[1])
+
+        response = self.client.post(reverse('exercise_answer_api'), {'answer': first.answer, 'position': 0})
+        data = response.json()
+        self.assertTrue(data['correct'])
+        self.assertEqual(data['exercises_remaining'], 4)
+        self.assertEqual(data['next']['question'], second.question)
+        self.assertEqual(data['next']['position'], 1)
+        self.assertEqual(ExerciseAttempt.objects.filter(session=session).count(), 1)
+
+    def test_answer_api_validates_with_the_answer_form(self):
+        self.start_session()
+        response = self.client.post(reverse('exercise_answer_api'), {'answer': 'abc', 'position': 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('answer', response.json()['errors'])
+
+    def test_each_answer_updates_progress_once(self):
+        session = self.start_session()
+        before = Progress.objects.get(user=self.user).last_activity
+        with mock.patch('exercises.services.time') as clock:
+            # Cada respuesta tarda 3 segundos
+            clock.time.side_effect = lambda: time.time() + 3
+            for position, exercise_id in enumerate(session.exercise_ids):
+                answer = Exercise.objects.get(id=exercise_id).answer
+                answer = answer if position % 2 == 0 else answer + 1
+                self.client.post(reverse('exercise_solve'), {'answer': answer, 'position': position})
+
+        progress = Progress.objects.get(user=self.user)
+        self.assertEqual(progress.total_exercises, 5)
+        self.assertEqual(progress.correct_answers, 3)
+        self.assertEqual(progress.total_time_spent, timedelta(seconds=15))
+        self.assertGreater(progress.last_activity, before)
+
+        # Al terminar no se vuelven a recorrer los intentos de la sesión
+        session.refresh_from_db()
+        with self.assertNumQueries(2):
+            finish_session(self.user, session)
+        progress.refresh_from_db()
+        self.assertEqual(progress.total_exercises, 5)
+
+    def test_operation_stats_match_a_rebuild(self):
+        session = self.start_session(10)
+        for index, exercise_id in enumerate(session.exercise_ids):
+            answer = Exercise.objects.get(id=exercise_id).answer
+            answer = answer if index % 2 else answer + 1
+            self.client.post(reverse('exercise_solve'), {'answer': answer, 'position': index})
+
+        rows = OperationStats.objects.order_by('operation_type', 'difficulty')
+        incremental = list(rows.values_list('operation_type', 'difficulty', 'attempts', 'correct'))
+        self.assertEqual(sum(attempts for _, _, attempts, _ in incremental), 10)
+        self.assertEqual(sum(correct for _, _, _, correct in incremental), 5)
+
+        call_command('rebuild_operation_stats', stdout=StringIO())
+        rebuilt = list(rows.values_list('operation_type', 'difficulty', 'attempts', 'correct'))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_adaptive_session_adds_exercises_as_it_goes(self):
+        # Con el banco cargado, como en producción, cada ejercicio es una búsqueda
+        call_command('seed_exercise_bank', '--difficulty', '1', '--difficulty', '2', stdout=StringIO())
+        self.client.post(reverse('exercise_config'), {
+            'difficulty': self.difficulty.id,
+            'operation_type': 'adaptive',
+            'number_of_exercises': 5,
+        })
+        session = ExerciseSession.objects.get(user=self.user)
+        self.assertTrue(session.adaptive)
+        self.assertEqual(len(session.exercise_ids), 1)
+
+        for position in range(5):
+            session.refresh_from_db()
+            answer = Exercise.objects.get(id=session.exercise_ids[position]).answer
+            self.client.post(reverse('exercise_solve'), {'answer': answer, 'position': position})
+
+        session.refresh_from_db()
+        self.assertEqual(len(session.exercise_ids), 5)
+        self.assertEqual(session.correct_answers, 5)
+
+    def test_missing_level_fails_before_saving_the_exercise(self):
+        DifficultyLevel.objects.filter(value=1).delete()
+        with self.assertRaises(DifficultyLevel.DoesNotExist):
+            next_exercise_id(self.user.id)
+        self.assertFalse(Exercise.objects.exists())
+
+    def test_every_attempt_updates_the_adaptive_stats(self):
+        session = self.start_session()
+        for position, exercise_id in enumerate(session.exercise_ids):
+            # Respuestas incorrectas: en el nivel mínimo no cambia el nivel ni se reinicia la cuenta
+            answer = Exercise.objects.get(id=exercise_id).answer + 1
+            self.client.post(reverse('exercise_solve'), {'answer': answer, 'position': position})
+
+        stats = get_stats(self.user.id)
+        self.assertEqual(sum(operation['attempts'] for operation in stats.values()), 5)
+
+    def test_review_mode_brings_back_missed_exercises(self):
+        session = self.start_session()
+        missed = set(session.exercise_ids[:2])
+        for position, exercise_id in enumerate(session.exercise_ids):
+            exercise = Exercise.objects.get(id=exercise_id)
+            answer = exercise.answer + 1 if exercise_id in missed else exercise.answer
+            self.client.post(reverse('exercise_solve'), {'answer': answer, 'position': position})
+        self.client.get(reverse('exercise_solve'))
+
+        # Todavía no toca repasarlos
+        response = self.client.post(reverse('exercise_config'), {
+            'difficulty': self.difficulty.id,
+            'operation_type': 'review',
+            'number_of_exercises': 5,
+        })
+        self.assertRedirects(response, reverse('exercise_config'))
+
+        ReviewItem.objects.update(due_at=timezone.now() - timedelta(minutes=1))
+        self.client.post(reverse('exercise_config'), {
+            'difficulty': self.difficulty.id,
+            'operation_type': 'review',
+            'number_of_exercises': 5,
+        })
+        review_session = ExerciseSession.objects.filter(user=self.user).latest('start_time')
+        self.assertEqual(sorted(review_session.exercise_ids), sorted(missed))
+        self.assertEqual(review_session.total_exercises, len(missed))
+
+        for position, exercise_id in enumerate(review_session.exercise_ids):
+            answer = Exercise.objects.get(id=exercise_id).answer
+            self.client.post(reverse('exercise_solve'), {'answer': answer, 'position': position})
+        self.assertFalse(ReviewItem.objects.filter(due_at__lte=timezone.now()).exists())
+        self.assertEqual(set(ReviewItem.objects.values_list('repetitions', flat=True)), {1})
+
+    def test_state_is_rebuilt_from_the_database(self):
+        session = self.start_session()
+        self.client.post(reverse('exercise_solve'), {'answer': '1', 'position': 0})
+        cache.clear()
+
+        state = get_state(self.user.id)
+        self.assertEqual(state['session_id'], session.id)
+        self.assertEqual(state['position'], 1)
+
+    def test_resent_answer_is_rejected_instead_of_answering_the_next_exercise(self):
+        session = self.start_session()
+        first = Exercise.objects.get(id=session.exercise_ids[0])
+        self.client.post(reverse('exercise_solve'), {'answer': first.answer, 'position': 0})
+
+        response = self.client.post(reverse('exercise_solve'), {'answer': first.answer, 'position': 0})
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(reverse('exercise_answer_api'), {'answer': first.answer, 'position': 0})
+        self.assertEqual(response.status_code, 409)
+
+        self.assertEqual(list(ExerciseAttempt.objects.values_list('position', flat=True)), [0])
+        self.assertEqual(get_state(self.user.id)['position'], 1)
+
+    def test_stale_cached_state_is_rebuilt(self):
+        session = self.start_session()
+        stale_state = get_state(self.user.id)
+        first = Exercise.objects.get(id=session.exercise_ids[0])
+        self.client.post(reverse('exercise_solve'), {'answer': first.answer, 'position': 0})
+
+        # Otro proceso aún tiene el estado anterior en su caché local
+        cache.set(f"exercise_state:{self.user.id}", stale_state)
+        cache.delete(f"exercise_state:{session.id}:0")
+        self.client.post(reverse('exercise_solve'), {'answer': '1', 'position': 0})
+
+        self.assertEqual(get_state(self.user.id)['position'], 1)
+        second = Exercise.objects.get(id=session.exercise_ids[1])
+        self.client.post(reverse('exercise_solve'), {'answer': second.answer, 'position': 1})
+        self.assertEqual(ExerciseAttempt.objects.filter(session=session).count(), 2)
+
+    def test_solve_page_sends_the_position_with_the_answer(self):
+        self.start_session()
+        response = self.client.get(reverse('exercise_solve'))
+        self.assertContains(response, '<input type="hidden" name="position" value="0" id="id_position">', html=True)
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('config/', views.exercise_config, name='exercise_config'),
     path('solve/', views.exercise_solve, name='exercise_solve'),
+    path('api/answer/', views.exercise_answer_api, name='exercise_answer_api'),
     path('results/<int:session_id>/', views.exercise_results, name='exercise_results'),
     path('history/', views.exercise_history, name='exercise_history'),
+    path('export/attempts/', views.export_attempts, name='export_attempts'),
 ]
\ No newline at end of file
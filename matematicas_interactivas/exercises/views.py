@@ -1,73 +1,39 @@
-import random
-import time
-from datetime import timedelta
-from decimal import Decimal
-
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.urls import reverse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Avg, Sum, Count
+from django.db.models import Sum, Count, Q
 
-from .models import Category, DifficultyLevel, Exercise, ExerciseSession, ExerciseAttempt
-from .forms import ExerciseConfigForm, ExerciseAnswerForm
-from users.models import ActivityLog
+from .models import Exercise, ExerciseSession
+from .forms import ExerciseConfigForm, ExerciseAnswerForm, AttemptExportForm
+from .adaptive import next_exercise_id
+from .bank import ensure_defaults, get_bank_exercise_ids
+from .export import CONTENT_TYPES, aiter_export, export_queryset
+from .fragments import aget_fragment_version
+from .generator import default_generator
+from .review import due_exercise_ids
+from .services import finish_session, submit_answer
+from .state import aget_state, get_state, start_state
+from users.activity import log_activity
+from matematicas_interactivas.pagination import akeyset_paginate
+from matematicas_interactivas.shortcuts import alist, arender
 
-def generate_exercise(operation_type, difficulty_level):
-    """Genera un ejercicio matemático aleatorio"""
-    # Definir rangos según dificultad
-    if difficulty_level.value == 1:  # Fácil
-        num1_range = (1, 10)
-        num2_range = (1, 10)
-    elif difficulty_level.value == 2:  # Medio
-        num1_range = (10, 50)
-        num2_range = (10, 50)
-    else:  # Difícil
-        num1_range = (50, 100)
-        num2_range = (50, 100)
-    
-    # Generar números aleatorios
-    num1 = random.randint(*num1_range)
-    num2 = random.randint(*num2_range)
-    
-    # Generar ejercicio según operación
-    if operation_type == 'addition':
-        question = f"{num1} + {num2}"
-        answer = num1 + num2
-    elif operation_type == 'subtraction':
-        # Asegurar que el resultado sea positivo
-        if num1 < num2:
-            num1, num2 = num2, num1
-        question = f"{num1} - {num2}"
-        answer = num1 - num2
-    elif operation_type == 'multiplication':
-        question = f"{num1} × {num2}"
-        answer = num1 * num2
-    elif operation_type == 'division':
-        # Asegurar que la división sea exacta
-        product = num1 * num2
-        question = f"{product} ÷ {num1}"
-        answer = num2
-    else:
-        raise ValueError(f"Tipo de operación no válido: {operation_type}")
-    
-    return {
-        'question': question,
-        'answer': Decimal(str(answer)),
-        'operation_type': operation_type
-    }
+HISTORY_PAGE_SIZE = 20
+
+def generate_exercises(operation_type, difficulty_level, count):
+    """Genera de una vez todos los ejercicios de una sesión"""
+    return default_generator.generate(operation_type, difficulty_level.value, count)
 
 @login_required
 def exercise_config(request):
     """Vista para configurar una sesión de ejercicios"""
     # Crear categorías y niveles de dificultad si no existen
-    if Category.objects.count() == 0:
-        Category.objects.create(name="Aritmética Básica", description="Operaciones aritméticas básicas")
-    
-    if DifficultyLevel.objects.count() == 0:
-        DifficultyLevel.objects.create(name="Fácil", description="Números del 1 al 10", value=1)
-        DifficultyLevel.objects.create(name="Medio", description="Números del 10 al 50", value=2)
-        DifficultyLevel.objects.create(name="Difícil", description="Números del 50 al 100", value=3)
+    ensure_defaults()
     
     if request.method == 'POST':
         form = ExerciseConfigForm(request.POST)
@@ -78,26 +44,41 @@ def exercise_config(request):
             operation_type = form.cleaned_data.get('operation_type')
             number_of_exercises = int(form.cleaned_data.get('number_of_exercises'))
             
+            adaptive = operation_type == 'adaptive'
+            if operation_type == 'review':
+                # Ejercicios fallados cuyo repaso ya toca
+                exercise_ids = due_exercise_ids(request.user.id, number_of_exercises)
+                if not exercise_ids:
+                    messages.info(request, "No tienes ejercicios pendientes de repaso.")
+                    return redirect('exercise_config')
+                number_of_exercises = len(exercise_ids)
+            elif adaptive:
+                # Solo el primero: los demás se eligen al responder cada uno
+                exercise_ids = [next_exercise_id(request.user.id, difficulty.value)]
+            else:
+                # Generar todos los ejercicios de la sesión en un solo lote
+                exercises_data = generate_exercises(operation_type, difficulty, number_of_exercises)
+                exercise_ids = get_bank_exercise_ids(exercises_data, difficulty)
+            
             # Crear sesión de ejercicios
             session = ExerciseSession.objects.create(
                 user=request.user,
                 total_exercises=number_of_exercises,
                 difficulty=difficulty,
-                category=category
+                category=category,
+                exercise_ids=exercise_ids,
+                adaptive=adaptive
             )
             
             # Registrar actividad
-            ActivityLog.objects.create(
+            log_activity(
                 user=request.user,
                 activity_type='inicio_sesion_ejercicios',
                 description=f"Inició una sesión de {number_of_exercises} ejercicios de {difficulty.name}"
             )
             
-            # Guardar configuración en sesión
-            request.session['exercise_session_id'] = session.id
-            request.session['operation_type'] = operation_type
-            request.session['exercises_remaining'] = number_of_exercises
-            request.session['exercise_start_time'] = time.time()
+            # Guardar el estado de la sesión en caché
+            start_state(request.user.id, session)
             
             return redirect('exercise_solve')
     else:
@@ -106,145 +87,126 @@ def exercise_config(request):
     return render(request, 'exercises/config.html', {'form': form})
 
 @login_required
-def exercise_solve(request):
+async def exercise_solve(request):
     """Vista para resolver ejercicios"""
+    user = await request.auser()
+    
     # Verificar si hay una sesión activa
-    session_id = request.session.get('exercise_session_id')
-    if not session_id:
+    state = await aget_state(user.id)
+    if state is None:
         messages.error(request, "No hay una sesión de ejercicios activa.")
         return redirect('exercise_config')
     
-    session = get_object_or_404(ExerciseSession, id=session_id, user=request.user)
-    operation_type = request.session.get('operation_type', 'all')
-    exercises_remaining = request.session.get('exercises_remaining', 0)
+    session = await aget_object_or_404(ExerciseSession, id=state['session_id'], user=user)
+    exercises_remaining = state['total'] - state['position']
     
     # Verificar si quedan ejercicios
     if exercises_remaining <= 0:
-        # Finalizar sesión
-        session.end_time = timezone.now()
-        session.save()
-        
-        # Registrar actividad
-        ActivityLog.objects.create(
-            user=request.user,
-            activity_type='fin_sesion_ejercicios',
-            description=f"Completó una sesión de ejercicios con {session.correct_answers}/{session.total_exercises} respuestas correctas"
-        )
-        
-        # Actualizar progreso del usuario
-        progress = request.user.progress.first()
-        if progress:
-            progress.total_exercises += session.total_exercises
-            progress.correct_answers += session.correct_answers
-            
-            # Actualizar estadísticas por tipo de operación
-            for attempt in session.attempts.all():
-                op_type = attempt.exercise.operation_type
-                if op_type == 'addition':
-                    progress.addition_exercises += 1
-                    if attempt.is_correct:
-                        progress.addition_correct += 1
-                elif op_type == 'subtraction':
-                    progress.subtraction_exercises += 1
-                    if attempt.is_correct:
-                        progress.subtraction_correct += 1
-                elif op_type == 'multiplication':
-                    progress.multiplication_exercises += 1
-                    if attempt.is_correct:
-                        progress.multiplication_correct += 1
-                elif op_type == 'division':
-                    progress.division_exercises += 1
-                    if attempt.is_correct:
-                        progress.division_correct += 1
-            
-            progress.save()
-        
-        # Limpiar sesión
-        del request.session['exercise_session_id']
-        del request.session['operation_type']
-        del request.session['exercises_remaining']
-        if 'exercise_start_time' in request.session:
-            del request.session['exercise_start_time']
-        
+        await sync_to_async(finish_session)(user, session)
         return redirect('exercise_results', session_id=session.id)
     
-    # Generar ejercicio
-    if operation_type == 'all':
-        # Seleccionar una operación aleatoria
-        operations = ['addition', 'subtraction', 'multiplication', 'division']
-        selected_operation = random.choice(operations)
-    else:
-        selected_operation = operation_type
-    
-    exercise_data = generate_exercise(selected_operation, session.difficulty)
-    
-    # Crear o obtener categoría
-    category, _ = Category.objects.get_or_create(name="Aritmética Básica")
-    
-    # Guardar ejercicio en la base de datos
-    exercise = Exercise.objects.create(
-        category=category,
-        difficulty=session.difficulty,
-        operation_type=exercise_data['operation_type'],
-        question=exercise_data['question'],
-        answer=exercise_data['answer']
-    )
+    # Obtener el ejercicio actual de la lista generada al configurar la sesión
+    exercise = await aget_object_or_404(Exercise, id=session.exercise_ids[state['position']])
     
     if request.method == 'POST':
         form = ExerciseAnswerForm(request.POST)
+        if form.is_valid() and form.cleaned_data['position'] != state['position']:
+            # Reenvío o respuesta a un ejercicio que ya no es el actual
+            messages.error(request, "Esa respuesta no corresponde al ejercicio actual.")
+            context = solve_context(ExerciseAnswerForm(), exercise, session, state)
+            return await arender(request, 'exercises/solve.html', context, status=409)
         if form.is_valid():
-            user_answer = form.cleaned_data['answer']
-            is_correct = user_answer == exercise_data['answer']
-            
-            # Calcular tiempo tomado
-            start_time = request.session.get('exercise_start_time', time.time())
-            time_taken = timedelta(seconds=int(time.time() - start_time))
+            # Guardar intento y actualizar sesión y progreso
+            attempt = await sync_to_async(submit_answer)(user, state, session, exercise, form.cleaned_data['answer'])
             
-            # Guardar intento
-            ExerciseAttempt.objects.create(
-                session=session,
-                exercise=exercise,
-                user_answer=user_answer,
-                is_correct=is_correct,
-                time_taken=time_taken
-            )
-            
-            # Actualizar sesión
-            if is_correct:
-                session.correct_answers += 1
-                session.save()
+            if attempt is None:
+                # Envío duplicado: ya se registró una respuesta para este ejercicio
+                pass
+            elif attempt.is_correct:
                 messages.success(request, "¡Respuesta correcta!")
             else:
-                messages.error(request, f"Respuesta incorrecta. La respuesta correcta es {exercise_data['answer']}.")
-            
-            # Actualizar contador de ejercicios
-            exercises_remaining -= 1
-            request.session['exercises_remaining'] = exercises_remaining
-            
-            # Actualizar tiempo de inicio para el siguiente ejercicio
-            request.session['exercise_start_time'] = time.time()
+                messages.error(request, f"Respuesta incorrecta. La respuesta correcta es {exercise.answer}.")
             
             return redirect('exercise_solve')
     else:
         form = ExerciseAnswerForm()
-        # Actualizar tiempo de inicio
-        request.session['exercise_start_time'] = time.time()
     
-    context = {
+    return await arender(request, 'exercises/solve.html', solve_context(form, exercise, session, state))
+
+def solve_context(form, exercise, session, state):
+    """Contexto de la página del ejercicio actual"""
+    exercises_remaining = state['total'] - state['position']
+    return {
         'form': form,
         'exercise': exercise,
+        'position': state['position'],
         'session': session,
         'exercises_remaining': exercises_remaining,
         'progress_percentage': int((session.total_exercises - exercises_remaining) / session.total_exercises * 100)
     }
+
+def exercise_payload(exercise):
+    """Datos de un ejercicio para la respuesta JSON"""
+    return {
+        'id': exercise.id,
+        'question': exercise.question,
+        'operation_type': exercise.operation_type,
+        'operation_name': exercise.get_operation_type_display(),
+    }
+
+@login_required
+@require_POST
+def exercise_answer_api(request):
+    """API JSON para responder el ejercicio actual y recibir el siguiente"""
+    state = get_state(request.user.id)
+    if state is None:
+        return JsonResponse({'error': "No hay una sesión de ejercicios activa."}, status=409)
+    
+    session = get_object_or_404(ExerciseSession, id=state['session_id'], user=request.user)
+    if state['position'] >= state['total']:
+        return JsonResponse({'error': "La sesión de ejercicios ya terminó."}, status=409)
+    exercise = get_object_or_404(Exercise, id=session.exercise_ids[state['position']])
+    
+    form = ExerciseAnswerForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+    if form.cleaned_data['position'] != state['position']:
+        return JsonResponse({'error': "Esa respuesta no corresponde al ejercicio actual."}, status=409)
+    
+    attempt = submit_answer(request.user, state, session, exercise, form.cleaned_data['answer'])
+    if attempt is None:
+        return JsonResponse({'error': "Este ejercicio ya fue respondido."}, status=409)
+    
+    exercises_remaining = state['total'] - state['position'] - 1
+    data = {
+        'correct': attempt.is_correct,
+        'correct_answer': str(exercise.answer),
+        'exercises_remaining': exercises_remaining,
+        'progress_percentage': int((state['total'] - exercises_remaining) / state['total'] * 100),
+        'next': None,
+    }
+    
+    if exercises_remaining > 0:
+        next_exercise = get_object_or_404(Exercise, id=session.exercise_ids[state['position'] + 1])
+        data['next'] = dict(exercise_payload(next_exercise), position=state['position'] + 1)
+    else:
+        finish_session(request.user, session)
+        data['results_url'] = reverse('exercise_results', args=[session.id])
     
-    return render(request, 'exercises/solve.html', context)
+    return JsonResponse(data)
 
 @login_required
-def exercise_results(request, session_id):
+async def exercise_results(request, session_id):
     """Vista para mostrar resultados de una sesión de ejercicios"""
-    session = get_object_or_404(ExerciseSession, id=session_id, user=request.user)
-    attempts = session.attempts.all().order_by('created_at')
+    user = await request.auser()
+    session = await aget_object_or_404(ExerciseSession, id=session_id, user=user)
+    
+    # Intentos con su ejercicio y totales por operación
+    attempts = await alist(session.attempts.select_related('exercise').order_by('created_at'))
+    operation_totals = await alist(session.attempts.values('exercise__operation_type').annotate(
+        total=Count('id'),
+        correct=Count('id', filter=Q(is_correct=True)),
+    ).order_by())
     
     # Calcular estadísticas
     stats = {
@@ -255,14 +217,13 @@ def exercise_results(request, session_id):
         'avg_time_per_exercise': session.duration() / session.total_exercises if session.total_exercises > 0 else 0,
     }
     
-    # Estadísticas por tipo de operación
+    # Estadísticas por tipo de operación (una sola consulta agrupada)
+    totals = {row['exercise__operation_type']: row for row in operation_totals}
     operation_stats = {}
     for op_type, op_name in Exercise.OPERATION_CHOICES:
-        op_attempts = attempts.filter(exercise__operation_type=op_type)
-        op_correct = op_attempts.filter(is_correct=True).count()
-        op_total = op_attempts.count()
-        
-        if op_total > 0:
+        if op_type in totals:
+            op_total = totals[op_type]['total']
+            op_correct = totals[op_type]['correct']
             operation_stats[op_type] = {
                 'name': op_name,
                 'total': op_total,
@@ -277,24 +238,53 @@ def exercise_results(request, session_id):
         'operation_stats': operation_stats
     }
     
-    return render(request, 'exercises/results.html', context)
+    return await arender(request, 'exercises/results.html', context)
 
 @login_required
-def exercise_history(request):
+async def exercise_history(request):
     """Vista para mostrar historial de sesiones de ejercicios"""
-    sessions = ExerciseSession.objects.filter(user=request.user).order_by('-start_time')
+    user = await request.auser()
+    sessions = ExerciseSession.objects.filter(user=user)
     
-    # Estadísticas generales
-    total_exercises = sessions.aggregate(Sum('total_exercises'))['total_exercises__sum'] or 0
-    total_correct = sessions.aggregate(Sum('correct_answers'))['correct_answers__sum'] or 0
+    # Una página de sesiones (paginación por cursor) con sus relaciones
+    page = await akeyset_paginate(
+        sessions.select_related('difficulty', 'category'),
+        'start_time',
+        cursor=request.GET.get('cursor'),
+        page_size=HISTORY_PAGE_SIZE,
+    )
+    totals = await sessions.aaggregate(total_exercises=Sum('total_exercises'), total_correct=Sum('correct_answers'))
+    history_version = await aget_fragment_version(user.id)
+    total_exercises = totals['total_exercises'] or 0
+    total_correct = totals['total_correct'] or 0
     
     overall_accuracy = round((total_correct / total_exercises) * 100, 2) if total_exercises > 0 else 0
     
     context = {
-        'sessions': sessions,
+        'sessions': page,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
         'total_exercises': total_exercises,
         'total_correct': total_correct,
-        'overall_accuracy': overall_accuracy
+        'overall_accuracy': overall_accuracy,
+        # Las filas de las sesiones finalizadas se cachean con esta versión
+        'history_version': history_version,
     }
     
-    return render(request, 'exercises/history.html', context)
\ No newline at end of file
+    return await arender(request, 'exercises/history.html', context)
+
+@staff_member_required
+async def export_attempts(request):
+    """Exporta los intentos filtrados en CSV o JSON por líneas, sin cargarlos en memoria"""
+    form = AttemptExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+    
+    filters = dict(form.cleaned_data)
+    export_format = filters.pop('format') or 'csv'
+    rows = export_queryset(**filters)
+    
+    response = StreamingHttpResponse(aiter_export(rows, export_format), content_type=CONTENT_TYPES[export_format])
+    filename = f"intentos_{timezone.now():%Y%m%d_%H%M%S}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,147 @@
+"""Utilidades comunes de los comandos de benchmark.
+
+Los benchmarks se ejecutan contra una base de datos desechable (un archivo
+SQLite temporal creado como la base de datos de pruebas), miden la latencia
+de cada paso desde el cliente y guardan los resultados como líneas base en
+JSON para compararlos entre commits.
+"""
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from .metrics import percentile
+
+BASELINE_DIR = Path(settings.BASE_DIR) / 'benchmarks'
+
+# Métricas que se comparan con la línea base: más alto es peor
+COMPARED_METRICS = ['p95_ms', 'avg_queries']
+
+
+@contextmanager
+def throwaway_database():
+    """Crea una base de datos de pruebas en un archivo temporal y la borra al salir.
+
+    Se usa un archivo (y no SQLite en memoria) para que varios hilos puedan
+    trabajar a la vez sobre la misma base de datos.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        for alias in connections:
+            connections[alias].settings_dict.setdefault('TEST', {})['NAME'] = str(Path(directory) / f'{alias}.sqlite3')
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+
+class LatencyRecorder:
+    """Latencias por paso, seguras para varios hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def stop(self):
+        self.finished_at = time.perf_counter()
+
+    @contextmanager
+    def measure(self, step):
+        """Mide el bloque y guarda su latencia bajo ``step``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self._latencies[step].append(latency)
+
+    def summary(self, queries_per_step=None):
+        """Resume cada paso: peticiones, percentiles en ms y consultas medias"""
+        queries_per_step = queries_per_step or {}
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        steps = {}
+        with self._lock:
+            latencies = {step: list(values) for step, values in self._latencies.items()}
+        for step, values in latencies.items():
+            steps[step] = {
+                'requests': len(values),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+                'avg_queries': queries_per_step.get(step),
+            }
+        total = sum(len(values) for values in latencies.values())
+        return {
+            'requests': total,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'steps': steps,
+        }
+
+
+def current_commit():
+    """Devuelve el commit actual de git, o ``None`` si no se puede obtener"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def baseline_path(name):
+    return BASELINE_DIR / f'{name}.json'
+
+
+def save_baseline(name, results):
+    """Guarda los resultados como línea base ``name``"""
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = baseline_path(name)
+    path.write_text(json.dumps(dict(results, commit=current_commit()), indent=2, sort_keys=True) + '\n')
+    return path
+
+
+def load_baseline(name):
+    """Carga la línea base ``name``, o devuelve ``None`` si no existe"""
+    path = baseline_path(name)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """Devuelve las regresiones respecto a la línea base.
+
+    Una métrica es una regresión si supera su valor en la línea base en más
+    de ``tolerance`` (0.2 = un 20 %).
+    """
+    regressions = []
+    for step, current in results['steps'].items():
+        previous = baseline['steps'].get(step)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + tolerance):
+                regressions.append({'step': step, 'metric': metric, 'baseline': before, 'current': after})
+    return regressions
@@ -0,0 +1,9 @@
+from django.conf import settings
+
+
+def template_fragments(request):
+    """Versión y duración de los fragmentos cacheados con {% cache %}"""
+    return {
+        'fragment_version': getattr(settings, 'TEMPLATE_FRAGMENT_VERSION', 1),
+        'fragment_timeout': getattr(settings, 'TEMPLATE_FRAGMENT_TIMEOUT', 300),
+    }
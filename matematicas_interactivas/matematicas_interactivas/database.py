@@ -0,0 +1,96 @@
+"""Configuración de la base de datos.
+
+``database_settings`` construye ``DATABASES['default']`` a partir del
+entorno: SQLite por defecto, o PostgreSQL (con pool de conexiones opcional)
+con ``DATABASE_ENGINE=postgresql``. En SQLite, cada conexión nueva recibe los
+PRAGMA de ``SQLITE_PRAGMAS`` para que las escrituras concurrentes esperen su
+turno en lugar de fallar con "database is locked".
+"""
+import os
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_SQLITE_PRAGMAS = {
+    # Milisegundos que se espera un bloqueo antes de fallar (primero, para
+    # que el cambio de journal_mode también espere)
+    'busy_timeout': 5000,
+    # Los lectores no bloquean al escritor ni al revés
+    'journal_mode': 'WAL',
+    # Con WAL no se pierde consistencia, solo se evita un fsync por commit
+    'synchronous': 'NORMAL',
+    # Caché de páginas en KiB (valor negativo): unos 20 MB por conexión
+    'cache_size': -20000,
+    # Lecturas mediante memoria mapeada: hasta 128 MB
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def database_settings(base_dir):
+    """Devuelve la configuración de la base de datos por defecto según el entorno.
+
+    Variables: DATABASE_ENGINE (``sqlite`` o ``postgresql``), DATABASE_NAME,
+    DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST, DATABASE_PORT,
+    DATABASE_CONN_MAX_AGE (segundos que se reutiliza una conexión; solo con
+    WSGI) y, en
+    PostgreSQL, DATABASE_POOL=1 con DATABASE_POOL_MIN_SIZE y
+    DATABASE_POOL_MAX_SIZE.
+    """
+    engine = os.environ.get('DATABASE_ENGINE', 'sqlite')
+    # Con ASGI cada petición corre en un hilo nuevo y las conexiones
+    # persistentes se acumulan sin reutilizarse, así que por defecto se cierran
+    # al terminar la petición. Subirlo solo tiene sentido sirviendo con WSGI.
+    conn_max_age = _env_int('DATABASE_CONN_MAX_AGE', 0)
+
+    if engine == 'postgresql':
+        pool = os.environ.get('DATABASE_POOL', '0') == '1'
+        options = {}
+        if pool:
+            options['pool'] = {
+                'min_size': _env_int('DATABASE_POOL_MIN_SIZE', 2),
+                'max_size': _env_int('DATABASE_POOL_MAX_SIZE', 10),
+            }
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'matematicas_interactivas'),
+            'USER': os.environ.get('DATABASE_USER', ''),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+            'PORT': os.environ.get('DATABASE_PORT', '5432'),
+            # El pool de psycopg ya reutiliza las conexiones y no admite CONN_MAX_AGE
+            'CONN_MAX_AGE': 0 if pool else conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': options,
+        }
+
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DATABASE_NAME', base_dir / 'db.sqlite3'),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Cada transacción toma el bloqueo de escritura al empezar; si no,
+            # dos transacciones que leen y después escriben pueden fallar al
+            # instante aunque haya busy_timeout
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': DEFAULT_SQLITE_PRAGMAS['busy_timeout'] / 1000,
+        },
+    }
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Aplica los PRAGMA de SQLite a cada conexión nueva"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS)
+    # Directamente sobre la conexión de sqlite3, para que no cuenten como
+    # consultas de la petición
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
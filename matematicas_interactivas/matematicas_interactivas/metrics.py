@@ -0,0 +1,226 @@
+"""Métricas por petición: consultas, tiempo de base de datos, de plantillas y latencia.
+
+``RequestMetricsMiddleware`` abre un ``RequestMetrics`` por petición en una
+variable de contexto, que también ven los hilos de ``sync_to_async``. Las
+consultas se cuentan con un ``execute_wrapper`` instalado en cada conexión y
+el tiempo de plantillas con el motor ``TimedDjangoTemplates``. Al terminar, la
+petición se suma a los agregados por nombre de URL y se escribe una línea de
+log en JSON.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Latencias recientes que se guardan por vista para calcular percentiles
+LATENCY_SAMPLES = 1000
+
+_current = ContextVar('request_metrics', default=None)
+
+# Sentencias de control de transacciones: cuentan en el tiempo de base de
+# datos pero no como consultas, porque dentro de un ``TestCase`` los bloques
+# atómicos se convierten en ``SAVEPOINT`` y el número dejaría de coincidir
+# con el de producción
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+_views_lock = threading.Lock()
+_views = defaultdict(lambda: {
+    'requests': 0,
+    'queries': 0,
+    'db_time': 0.0,
+    'template_time': 0.0,
+    'latency': 0.0,
+    'max_latency': 0.0,
+    'samples': deque(maxlen=LATENCY_SAMPLES),
+})
+
+
+class QueryBudgetExceeded(Exception):
+    """Una vista ha hecho más consultas de las que permite su presupuesto"""
+
+
+class RequestMetrics:
+    """Contadores de una petición"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def _install_wrapper(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_wrapper(connection)
+
+
+def install_query_recorder():
+    """Cuenta las consultas de todas las conexiones, abiertas y futuras"""
+    connection_created.connect(_on_connection_created, dispatch_uid='request_metrics')
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(connection)
+
+
+class TimedTemplate(Template):
+    """Plantilla que suma su tiempo de renderizado a la petición en curso"""
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Motor de plantillas de Django que mide el tiempo de renderizado"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def percentile(values, fraction):
+    """Percentil de ``values`` por interpolación lineal (``fraction`` entre 0 y 1)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def record_request(view_name, metrics, latency):
+    """Suma una petición a los agregados de su vista"""
+    with _views_lock:
+        view = _views[view_name]
+        view['requests'] += 1
+        view['queries'] += metrics.queries
+        view['db_time'] += metrics.db_time
+        view['template_time'] += metrics.template_time
+        view['latency'] += latency
+        view['max_latency'] = max(view['max_latency'], latency)
+        view['samples'].append(latency)
+
+
+def metrics_snapshot():
+    """Devuelve los agregados por vista, con medias y percentiles en milisegundos"""
+    with _views_lock:
+        views = {name: dict(view, samples=list(view['samples'])) for name, view in _views.items()}
+
+    snapshot = {}
+    for name, view in sorted(views.items()):
+        requests = view['requests']
+        snapshot[name] = {
+            'requests': requests,
+            'avg_queries': round(view['queries'] / requests, 2),
+            'avg_db_ms': round(view['db_time'] / requests * 1000, 2),
+            'avg_template_ms': round(view['template_time'] / requests * 1000, 2),
+            'avg_latency_ms': round(view['latency'] / requests * 1000, 2),
+            'p50_latency_ms': round(percentile(view['samples'], 0.5) * 1000, 2),
+            'p95_latency_ms': round(percentile(view['samples'], 0.95) * 1000, 2),
+            'max_latency_ms': round(view['max_latency'] * 1000, 2),
+        }
+    return snapshot
+
+
+def reset_metrics():
+    """Pone a cero los agregados (útil en pruebas y benchmarks)"""
+    with _views_lock:
+        _views.clear()
+
+
+def check_budget(view_name, metrics):
+    """Avisa (o falla, en modo estricto) si la vista supera su presupuesto de consultas"""
+    budget = getattr(settings, 'VIEW_QUERY_BUDGETS', {}).get(view_name)
+    if budget is None or metrics.queries <= budget:
+        return
+    message = f"La vista '{view_name}' hizo {metrics.queries} consultas (presupuesto: {budget})"
+    if getattr(settings, 'VIEW_QUERY_BUDGETS_STRICT', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class RequestMetricsMiddleware:
+    """Mide cada petición y la registra por nombre de URL"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install_query_recorder()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, latency):
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        record_request(view_name, metrics, latency)
+        logger.info(json.dumps({
+            'event': 'request',
+            'view': view_name,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'latency_ms': round(latency * 1000, 2),
+        }))
+        check_budget(view_name, metrics)
+        return response
@@ -0,0 +1,135 @@
+"""Paginación para listados grandes.
+
+- Por cursor (keyset), para listados ordenados por fecha: en lugar de
+  ``OFFSET``, cada página continúa a partir de la última fila mostrada, de
+  modo que el coste de una página no crece con el historial.
+- Con total estimado (``EstimatedCountPaginator``), para los listados del
+  admin: el total de una tabla grande sin filtros se toma de las
+  estadísticas de la base de datos en lugar de ejecutar ``COUNT(*)``.
+"""
+import base64
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """Una página de resultados y el cursor para pedir la siguiente"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(timestamp, pk):
+    """Codifica la posición (fecha, id) de una fila como un cursor opaco"""
+    raw = f"{timestamp.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """Decodifica un cursor; devuelve ``None`` si no es válido"""
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def _keyset_queryset(queryset, field, cursor):
+    queryset = queryset.order_by(f'-{field}', '-pk')
+
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        timestamp, pk = position
+        queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk}))
+    return queryset
+
+
+def _keyset_page(items, field, page_size):
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return KeysetPage(items, next_cursor)
+
+
+def keyset_paginate(queryset, field, cursor=None, page_size=20):
+    """Devuelve una página de ``queryset`` en orden descendente por ``field``.
+
+    El orden se desempata por ``pk`` para que el cursor sea estable aunque
+    varias filas compartan la misma fecha.
+    """
+    queryset = _keyset_queryset(queryset, field, cursor)
+    return _keyset_page(list(queryset[:page_size + 1]), field, page_size)
+
+
+async def akeyset_paginate(queryset, field, cursor=None, page_size=20):
+    """Versión asíncrona de ``keyset_paginate``"""
+    queryset = _keyset_queryset(queryset, field, cursor)
+    items = [item async for item in queryset[:page_size + 1]]
+    return _keyset_page(items, field, page_size)
+
+
+def estimated_row_count(model, using='default'):
+    """Estima las filas de la tabla de ``model`` según las estadísticas de la base de datos.
+
+    Devuelve ``None`` si no hay estadísticas (en SQLite se generan con
+    ``ANALYZE``; en PostgreSQL, con ``ANALYZE`` o el autovacuum).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    else:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            rows = cursor.fetchall()
+    except DatabaseError:
+        # SQLite solo crea sqlite_stat1 al ejecutar ANALYZE por primera vez
+        return None
+    # En SQLite, el primer número de cada fila es el de entradas del índice
+    estimates = [int(str(row[0]).split()[0]) for row in rows]
+    estimate = max(estimates, default=None)
+    # PostgreSQL devuelve -1 si la tabla no se ha analizado nunca
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginador que no cuenta todas las filas de las tablas grandes.
+
+    Sin filtros, el total se estima con ``estimated_row_count`` cuando supera
+    ``exact_count_limit``. Con filtros se cuenta, pero como mucho hasta
+    ``max_filtered_count`` filas, de modo que la consulta se detiene pronto.
+    """
+    exact_count_limit = 10000
+    max_filtered_count = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.exact_count_limit:
+                return estimate
+            return queryset.count()
+        return queryset[:self.max_filtered_count].count()
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import DEFAULT_SQLITE_PRAGMAS, database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -23,9 +26,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-!63kr1hk)pic=1t*^)5**1bbr3xd_!fx&=2+)h-zxocj+^n1rn'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Fuera de DEBUG se activan el modo WAL de SQLite y los estáticos con hash
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -37,11 +41,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'users'
-    'exercises'
+    'users',
+    'exercises',
 ]
 
 MIDDLEWARE = [
+    # Archivos de STATIC_ROOT, antes que el resto del middleware
+    'matematicas_interactivas.staticfiles.PrecompressedStaticFilesMiddleware',
+    'matematicas_interactivas.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,14 +62,23 @@ ROOT_URLCONF = 'matematicas_interactivas.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Igual que DjangoTemplates, pero mide el tiempo de renderizado
+        'BACKEND': 'matematicas_interactivas.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'matematicas_interactivas' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'matematicas_interactivas.context_processors.template_fragments',
+            ],
+            # Cada plantilla se lee y compila una sola vez por proceso (con
+            # runserver, la caché se vacía al modificar una plantilla)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -74,11 +90,112 @@ WSGI_APPLICATION = 'matematicas_interactivas.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+#
+# SQLite por defecto, con WAL, busy_timeout y conexiones persistentes (ver
+# matematicas_interactivas.database). Para PostgreSQL con pool de conexiones:
+#   DATABASE_ENGINE=postgresql DATABASE_NAME=... DATABASE_USER=... DATABASE_POOL=1
+
 DATABASES = {
+    'default': database_settings(BASE_DIR),
+}
+
+# PRAGMA que se aplican a cada conexión de SQLite. El modo WAL se guarda en
+# el propio archivo y crea los ficheros -wal y -shm, así que en desarrollo no
+# se activa para no reescribir el db.sqlite3 del repositorio
+SQLITE_PRAGMAS = DEFAULT_SQLITE_PRAGMAS if not DEBUG else {
+    name: value for name, value in DEFAULT_SQLITE_PRAGMAS.items() if name != 'journal_mode'
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Memoria local por defecto (también en los tests). Con varios procesos,
+# las cachés deben compartirse; basta con definir CACHE_BACKEND y
+# CACHE_LOCATION (y DASHBOARD_CACHE_BACKEND y DASHBOARD_CACHE_LOCATION para la
+# del dashboard), por ejemplo:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379/0
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    'dashboard': {
+        'BACKEND': os.environ.get('DASHBOARD_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DASHBOARD_CACHE_LOCATION', 'dashboard'),
+    },
+    # Fragmentos de plantilla ({% cache %}), con sus versiones por usuario
+    'template_fragments': {
+        'BACKEND': os.environ.get('FRAGMENT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('FRAGMENT_CACHE_LOCATION', 'template_fragments'),
+    },
+}
+
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+
+# Fragmentos de plantilla cacheados: cambiar la versión al modificar las
+# plantillas que los contienen, para no servir fragmentos con el HTML anterior
+TEMPLATE_FRAGMENT_VERSION = 1
+TEMPLATE_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Estado de la sesión de ejercicios en curso (exercises.state)
+EXERCISE_STATE_CACHE_ALIAS = 'default'
+
+
+# Registro de actividad diferido (users.activity)
+# Los registros se guardan por lotes desde un hilo en segundo plano cada
+# ACTIVITY_LOG_BATCH_SIZE registros o cada ACTIVITY_LOG_FLUSH_INTERVAL_MS
+# milisegundos. Si la cola se llena, se guardan en el momento.
+
+ACTIVITY_LOG_ASYNC = os.environ.get('ACTIVITY_LOG_ASYNC', '1') == '1'
+ACTIVITY_LOG_BATCH_SIZE = 50
+ACTIVITY_LOG_FLUSH_INTERVAL_MS = 200
+ACTIVITY_LOG_MAX_QUEUE_SIZE = 1000
+
+# Días que se conservan los registros de actividad antes de compactarlos en
+# resúmenes diarios (python manage.py compact_activity_logs)
+ACTIVITY_LOG_RETENTION_DAYS = 90
+
+
+# Métricas por petición (matematicas_interactivas.metrics)
+# Se consultan en /metrics/ con un usuario del personal.
+# VIEW_QUERY_BUDGETS limita las consultas por nombre de URL; al superarlo se
+# registra un aviso, o se lanza QueryBudgetExceeded si
+# VIEW_QUERY_BUDGETS_STRICT está activo (siempre lo está en los tests).
+
+VIEW_QUERY_BUDGETS = {
+    'dashboard': 7,
+    'progress': 5,
+    'activity_log': 4,
+    'leaderboard': 6,
+    'exercise_config': 11,
+    'exercise_solve': 12,
+    'exercise_answer_api': 13,
+    'exercise_results': 7,
+    'exercise_history': 6,
+}
+
+VIEW_QUERY_BUDGETS_STRICT = False
+
+TEST_RUNNER = 'matematicas_interactivas.test_runner.BudgetTestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'matematicas_interactivas.metrics': {
+            'handlers': ['console'],
+            'level': os.environ.get('METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -118,6 +235,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Destino de collectstatic, desde donde los sirve PrecompressedStaticFilesMiddleware
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Fuera de DEBUG, nombres con el hash del contenido y variantes .gz/.br
+    # generadas en collectstatic; en desarrollo, los archivos tal cual
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'matematicas_interactivas.staticfiles.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
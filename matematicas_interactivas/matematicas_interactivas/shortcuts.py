@@ -0,0 +1,17 @@
+"""Atajos para las vistas asíncronas."""
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+
+async def arender(request, template_name, context=None, status=None):
+    """Versión asíncrona de ``render``.
+
+    La plantilla se renderiza en el hilo síncrono porque los procesadores de
+    contexto (usuario, mensajes) pueden consultar la sesión y la base de datos.
+    """
+    return await sync_to_async(render)(request, template_name, context, status=status)
+
+
+async def alist(queryset):
+    """Evalúa un queryset de forma asíncrona y devuelve una lista"""
+    return [item async for item in queryset]
@@ -0,0 +1,200 @@
+"""Archivos estáticos con nombre por contenido, precomprimidos y cacheables para siempre.
+
+``CompressedManifestStaticFilesStorage`` añade a cada archivo versionado de
+``collectstatic`` sus variantes ``.gz`` y, si está instalado ``brotli``,
+``.br``. ``PrecompressedStaticFilesMiddleware`` sirve desde ``STATIC_ROOT``
+la variante que acepta el navegador, sin comprimir nada por petición, y marca
+como inmutables los archivos cuyo nombre incluye el hash del contenido.
+"""
+import gzip
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ico'}
+
+# Por debajo de este tamaño la cabecera de compresión no compensa
+MIN_COMPRESS_SIZE = 256
+
+# Extensión de cada codificación, en orden de preferencia a igual calidad
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Los archivos sin hash pueden cambiar con el siguiente despliegue
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+
+
+def _compress_gzip(content):
+    # mtime=0: el mismo contenido genera siempre el mismo archivo
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def _compressors():
+    compressors = [('.gz', _compress_gzip)]
+    if brotli is not None:
+        compressors.insert(0, ('.br', brotli.compress))
+    return compressors
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Almacenamiento con nombres por contenido que además precomprime los archivos"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Solo los nombres finales del manifiesto: los intermedios de las
+        # pasadas que reescriben referencias nunca se sirven
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        """Escribe las variantes comprimidas de ``name`` que ocupan menos que el original"""
+        if Path(name).suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for extension, compress in _compressors():
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            path = self.path(name + extension)
+            with open(path, 'wb') as output:
+                output.write(compressed)
+
+
+def parse_accept_encoding(header):
+    """Devuelve las codificaciones aceptadas con su calidad (``q``)"""
+    accepted = {}
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def choose_encoding(header, available):
+    """Elige entre ``available`` la codificación con mayor ``q`` para el cliente, o ``None``.
+
+    A igual calidad decide el orden de ``ENCODINGS``. Si el cliente pide
+    ``identity`` con más calidad que cualquier variante, se sirve sin comprimir.
+    """
+    accepted = parse_accept_encoding(header or '')
+    chosen, chosen_quality = None, 0.0
+    for encoding, _ in ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > chosen_quality:
+            chosen, chosen_quality = encoding, quality
+    if accepted.get('identity', 0.0) > chosen_quality:
+        return None
+    return chosen
+
+
+def load_immutable_names(static_root):
+    """Devuelve los archivos de ``STATIC_ROOT`` con hash en el nombre, según el manifiesto"""
+    try:
+        manifest = json.loads((Path(static_root) / ManifestStaticFilesStorage.manifest_name).read_text())
+    except (OSError, ValueError):
+        return set()
+    return set(manifest.get('paths', {}).values())
+
+
+class PrecompressedStaticFilesMiddleware:
+    """Sirve los archivos de ``STATIC_ROOT`` con la variante precomprimida que acepte el cliente.
+
+    Va al principio de ``MIDDLEWARE`` para que los archivos estáticos no
+    pasen por sesiones, autenticación ni métricas. Las rutas que no son de
+    archivos recopilados siguen su camino normal.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        static_root = getattr(settings, 'STATIC_ROOT', None)
+        static_url = getattr(settings, 'STATIC_URL', None) or ''
+        if not static_root or static_url.startswith(('http://', 'https://', '//')):
+            raise MiddlewareNotUsed
+        self.static_root = str(static_root)
+        self.prefix = '/' + static_url.strip('/') + '/'
+        self.immutable_names = load_immutable_names(self.static_root)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve(request) if self.is_static(request) else None
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await sync_to_async(self.serve)(request) if self.is_static(request) else None
+        return response if response is not None else await self.get_response(request)
+
+    def is_static(self, request):
+        return request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix)
+
+    def serve(self, request):
+        """Devuelve la respuesta del archivo pedido, o ``None`` si no existe"""
+        name = request.path_info[len(self.prefix):]
+        if not name or Path(name).suffix in {extension for _, extension in ENCODINGS}:
+            return None
+        try:
+            path = safe_join(self.static_root, name)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        available = {encoding: path + extension for encoding, extension in ENCODINGS
+                     if os.path.isfile(path + extension)}
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'), available)
+        served_path = available[encoding] if encoding else path
+
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = str(os.path.getsize(served_path))
+        else:
+            # FileResponse lo envía por bloques (o con sendfile si el servidor
+            # lo admite) en lugar de leerlo entero en memoria
+            response = FileResponse(open(served_path, 'rb'), content_type=content_type)
+            # FileResponse la deduce del nombre del archivo abierto; un
+            # estático no se descarga como adjunto
+            del response['Content-Disposition']
+        response['X-Content-Type-Options'] = 'nosniff'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if available:
+            response['Vary'] = 'Accept-Encoding'
+        immutable = name in self.immutable_names
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL
+        return response
@@ -0,0 +1,14 @@
+import logging
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class BudgetTestRunner(DiscoverRunner):
+    """Ejecuta las pruebas con los presupuestos de consultas en modo estricto"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.VIEW_QUERY_BUDGETS_STRICT = True
+        # El log de cada petición solo añade ruido a la salida de las pruebas
+        logging.getLogger('matematicas_interactivas.metrics').setLevel(logging.WARNING)
@@ -0,0 +1,15 @@
+"""Utilidades compartidas por las pruebas de las aplicaciones."""
+from unittest import skipUnless
+
+from django.db import connection
+
+
+@skipUnless(connection.vendor == 'sqlite', "Los planes de consulta se comprueban con SQLite")
+class QueryPlanAssertionsMixin:
+    """Comprobaciones sobre el plan de consulta (EXPLAIN) de SQLite"""
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan)
+        # El orden sale del índice, sin ordenar aparte
+        self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
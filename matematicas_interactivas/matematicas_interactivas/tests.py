@@ -0,0 +1,281 @@
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import reverse
+
+from exercises.bank import ensure_defaults
+from exercises.models import DifficultyLevel
+from .benchmarking import compare_to_baseline
+from .database import database_settings
+from .metrics import QueryBudgetExceeded, RequestMetrics, _current, metrics_snapshot, percentile, reset_metrics
+from .pagination import EstimatedCountPaginator, estimated_row_count
+from .staticfiles import PrecompressedStaticFilesMiddleware, brotli, choose_encoding
+
+
+class RequestMetricsTests(TestCase):
+    """Pruebas del middleware de métricas por petición"""
+
+    def setUp(self):
+        reset_metrics()
+        ensure_defaults()
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.client.force_login(self.user)
+
+    def test_metrics_are_recorded_per_url_name(self):
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('dashboard'))
+
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        data = self.client.get(reverse('metrics')).json()
+        dashboard = data['views']['dashboard']
+        self.assertEqual(dashboard['requests'], 2)
+        self.assertGreater(dashboard['avg_queries'], 0)
+        self.assertGreater(dashboard['avg_template_ms'], 0)
+        self.assertIn('hit_rate', data['dashboard_cache'])
+
+    def test_metrics_endpoint_is_staff_only(self):
+        # También desde local, que es lo que ve la aplicación detrás de un proxy
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_transaction_statements_are_not_counted(self):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with transaction.atomic():
+                with transaction.atomic():
+                    User.objects.count()
+        finally:
+            _current.reset(token)
+        self.assertEqual(metrics.queries, 1)
+
+    @override_settings(VIEW_QUERY_BUDGETS={'progress': 1})
+    def test_exceeding_a_budget_fails_in_tests(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('progress'))
+
+    def test_pages_stay_within_their_budgets(self):
+        difficulty = DifficultyLevel.objects.get(value=1)
+        self.client.post(reverse('exercise_config'), {
+            'difficulty': difficulty.id,
+            'operation_type': 'all',
+            'number_of_exercises': 5,
+        })
+        for position in range(5):
+            self.client.post(reverse('exercise_solve'), {'answer': '1', 'position': position})
+        self.client.get(reverse('exercise_solve'))
+
+        for name in ('dashboard', 'progress', 'activity_log', 'leaderboard', 'exercise_history'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+        self.assertIn('exercise_history', metrics_snapshot())
+
+
+class BenchmarkingTests(SimpleTestCase):
+    """Pruebas de las utilidades de benchmark"""
+
+    def test_percentile_interpolates(self):
+        values = [0.1, 0.2, 0.3, 0.4, 0.5]
+        self.assertAlmostEqual(percentile(values, 0.5), 0.3)
+        self.assertAlmostEqual(percentile(values, 0.95), 0.48)
+        self.assertEqual(percentile([], 0.99), 0.0)
+
+    def test_regressions_beyond_tolerance_are_reported(self):
+        baseline = {'steps': {'exercise_solve': {'p95_ms': 100, 'avg_queries': 8}}}
+        results = {'steps': {'exercise_solve': {'p95_ms': 115, 'avg_queries': 12}}}
+        regressions = compare_to_baseline(results, baseline, tolerance=0.2)
+        self.assertEqual([regression['metric'] for regression in regressions], ['avg_queries'])
+
+
+class DatabaseSettingsTests(TestCase):
+    """Pruebas de la configuración de la base de datos"""
+
+    def test_sqlite_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_sqlite_defaults(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            config = database_settings(Path('/tmp'))
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        # Sin conexiones persistentes por defecto: las vistas se sirven con ASGI
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+
+    def test_persistent_connections_from_environment(self):
+        with mock.patch.dict(os.environ, {'DATABASE_CONN_MAX_AGE': '60'}, clear=True):
+            config = database_settings(Path('/tmp'))
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+
+    def test_postgresql_pool_from_environment(self):
+        environ = {'DATABASE_ENGINE': 'postgresql', 'DATABASE_NAME': 'escuela', 'DATABASE_POOL': '1'}
+        with mock.patch.dict(os.environ, environ, clear=True):
+            config = database_settings(Path('/tmp'))
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['NAME'], 'escuela')
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 10})
+
+
+@skipUnless(connection.vendor == 'sqlite', "Las estadísticas se comprueban con SQLite")
+class EstimatedCountPaginatorTests(TestCase):
+    """El total de las tablas grandes se estima en lugar de contarse"""
+
+    def setUp(self):
+        User.objects.bulk_create([User(username=f'estudiante{index}') for index in range(30)])
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_small_tables_are_counted(self):
+        self.analyze()
+        self.assertEqual(EstimatedCountPaginator(User.objects.order_by('pk'), 10).count, 30)
+
+    def test_uses_statistics_above_the_limit(self):
+        self.analyze()
+        self.assertEqual(estimated_row_count(User), 30)
+        User.objects.create(username='sin_analizar')
+
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 10)
+        paginator.exact_count_limit = 20
+        # Sin consultar la tabla: la estimación aún no incluye el último usuario
+        self.assertEqual(paginator.count, 30)
+
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 10)
+        self.assertEqual(paginator.count, 31)
+
+    def test_filtered_count_is_capped(self):
+        paginator = EstimatedCountPaginator(User.objects.filter(username__startswith='estudiante').order_by('pk'), 10)
+        paginator.max_filtered_count = 25
+        self.assertEqual(paginator.count, 25)
+
+
+class TemplateLoaderTests(SimpleTestCase):
+    """Las plantillas se compilan una vez y se reutilizan"""
+
+    def test_templates_are_loaded_once(self):
+        engine = engines.all()[0].engine
+        self.assertIsInstance(engine.template_loaders[0], CachedLoader)
+        self.assertIs(
+            engine.get_template('exercises/history_row.html'),
+            engine.get_template('exercises/history_row.html'),
+        )
+
+
+class PrecompressedStaticFilesTests(SimpleTestCase):
+    """collectstatic precomprime los archivos y el middleware elige la variante"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source = Path(directory.name) / 'source'
+        source.mkdir()
+        (source / 'app.css').write_text('.ejercicio { color: #123456; }\n' * 50)
+        # Las referencias entre archivos generan nombres intermedios en cada pasada
+        (source / 'theme.css').write_text('@import url("app.css");\n' + '.tema { color: #654321; }\n' * 50)
+        self.static_root = Path(directory.name) / 'static'
+
+        overrides = override_settings(
+            STATIC_ROOT=str(self.static_root),
+            STATIC_URL='/static/',
+            STATICFILES_DIRS=[str(source)],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'matematicas_interactivas.staticfiles.CompressedManifestStaticFilesStorage'},
+            },
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        manifest = json.loads((self.static_root / 'staticfiles.json').read_text())
+        self.hashed_name = manifest['paths']['app.css']
+        self.middleware = PrecompressedStaticFilesMiddleware(lambda request: HttpResponse(status=404))
+
+    def get(self, name, accept_encoding=None, method='get'):
+        headers = {'HTTP_ACCEPT_ENCODING': accept_encoding} if accept_encoding is not None else {}
+        response = self.middleware(getattr(RequestFactory(), method)(f'/static/{name}', **headers))
+        self.addCleanup(response.close)
+        return response
+
+    def test_collectstatic_writes_compressed_variants(self):
+        self.assertNotEqual(self.hashed_name, 'app.css')
+        hashed_path = self.static_root / self.hashed_name
+        with gzip.open(f'{hashed_path}.gz') as compressed:
+            self.assertEqual(compressed.read(), hashed_path.read_bytes())
+        self.assertEqual((self.static_root / f'{self.hashed_name}.br').exists(), brotli is not None)
+
+    def test_only_final_names_are_compressed(self):
+        manifest = json.loads((self.static_root / 'staticfiles.json').read_text())
+        compressed = {path.name[:-len('.gz')] for path in self.static_root.glob('*.gz')}
+        self.assertEqual(compressed, {Path(name).name for name in manifest['paths'].values()})
+
+    def test_encoding_follows_accept_encoding(self):
+        best = 'br' if brotli is not None else 'gzip'
+        cases = [
+            ('gzip, deflate, br', best),
+            ('gzip', 'gzip'),
+            ('br;q=0, gzip;q=0.5', 'gzip'),
+            ('*', best),
+            ('gzip;q=0', None),
+            ('identity', None),
+            (None, None),
+        ]
+        for accept_encoding, expected in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(self.hashed_name, accept_encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get('Content-Encoding'), expected)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertNotIn('Content-Disposition', response)
+
+        response = self.get(self.hashed_name, 'gzip')
+        self.assertTrue(response.streaming)
+        body = gzip.decompress(response.getvalue())
+        self.assertEqual(body, (self.static_root / self.hashed_name).read_bytes())
+
+    def test_highest_quality_wins(self):
+        available = {'br': 'app.css.br', 'gzip': 'app.css.gz'}
+        cases = [
+            ('gzip;q=1, br;q=0.5', 'gzip'),
+            ('br;q=0.2, gzip;q=0.8', 'gzip'),
+            # A igual calidad, el orden de preferencia del servidor
+            ('gzip, br', 'br'),
+            ('*;q=0.5, gzip', 'gzip'),
+            ('identity, gzip;q=0.5', None),
+        ]
+        for accept_encoding, expected in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(choose_encoding(accept_encoding, available), expected)
+
+    def test_head_has_headers_without_body(self):
+        response = self.get(self.hashed_name, 'gzip', method='head')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(int(response['Content-Length']), (self.static_root / f'{self.hashed_name}.gz').stat().st_size)
+
+    def test_only_hashed_names_are_immutable(self):
+        self.assertIn('immutable', self.get(self.hashed_name, 'gzip')['Cache-Control'])
+        self.assertNotIn('immutable', self.get('app.css')['Cache-Control'])
+
+    def test_unknown_files_fall_through(self):
+        self.assertEqual(self.get('missing.css').status_code, 404)
+        self.assertEqual(self.get('../source/app.css').status_code, 404)
+        self.assertEqual(self.get(f'{self.hashed_name}.gz').status_code, 404)
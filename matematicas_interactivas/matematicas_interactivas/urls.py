@@ -23,6 +23,7 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('admin/', admin.site.urls),
+    path('metrics/', views.metrics_view, name='metrics'),
     path('users/', include('users.urls')),
     path('exercises/', include('exercises.urls')),
 ]
@@ -1,8 +1,22 @@
+from django.http import Http404, JsonResponse
 from django.shortcuts import redirect
 
+from users.cache import cache_stats
+from .metrics import metrics_snapshot
+
 def home(request):
     """Vista para la página principal que redirecciona a login o dashboard"""
     if request.user.is_authenticated:
         return redirect('dashboard')
     else:
-        return redirect('login')
\ No newline at end of file
+        return redirect('login')
+
+def metrics_view(request):
+    """Vista con las métricas por vista, solo accesible para el personal"""
+    # No se mira la IP: detrás de un proxy en la misma máquina todas serían locales
+    if not request.user.is_staff:
+        raise Http404
+    return JsonResponse({
+        'views': metrics_snapshot(),
+        'dashboard_cache': cache_stats(),
+    })
@@ -0,0 +1,122 @@
+"""Escritura diferida y por lotes del registro de actividad.
+
+Las vistas encolan los ``ActivityLog`` y un hilo en segundo plano los guarda
+con ``bulk_create`` cada N registros o cada T milisegundos, de modo que la
+petición no espera al bloqueo de escritura de la base de datos.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .cache import invalidate_dashboard
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogWriter:
+    """Cola de registros de actividad que se vacía en lotes"""
+
+    def __init__(self, batch_size=50, flush_interval=0.2, max_queue_size=1000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._atexit_registered = False
+
+    def start(self):
+        """Arranca el hilo escritor si todavía no está en marcha"""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout=5):
+        """Detiene el hilo y guarda todo lo que quede en la cola"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def log(self, user, activity_type, description):
+        """Encola un registro; si la cola está llena lo guarda en el momento"""
+        entry = ActivityLog(user=user, activity_type=activity_type, description=description)
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            entry.save()
+        return entry
+
+    def flush(self):
+        """Guarda en un único lote todos los registros pendientes"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(batch)
+        return len(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            ActivityLog.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception:
+            logger.exception("No se pudieron guardar %s registros de actividad", len(batch))
+            return
+        # bulk_create no envía post_save, así que se invalida aquí
+        for user_id in {entry.user_id for entry in batch}:
+            invalidate_dashboard(user_id)
+
+    def _run(self):
+        try:
+            while not self._stopping.is_set():
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self.queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                self._write(batch)
+        finally:
+            connection.close()
+
+
+writer = ActivityLogWriter(
+    batch_size=getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 50),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL_MS', 200) / 1000,
+    max_queue_size=getattr(settings, 'ACTIVITY_LOG_MAX_QUEUE_SIZE', 1000),
+)
+
+
+def log_activity(user, activity_type, description):
+    """Registra una actividad del usuario.
+
+    Si la escritura diferida está desactivada, o si se llama dentro de una
+    transacción (para que el registro siga su misma suerte), se guarda en el
+    momento.
+    """
+    if not getattr(settings, 'ACTIVITY_LOG_ASYNC', False) or connection.in_atomic_block:
+        return ActivityLog.objects.create(user=user, activity_type=activity_type, description=description)
+
+    writer.start()
+    return writer.log(user, activity_type, description)
@@ -1,5 +1,18 @@
 from django.contrib import admin
-from .models import Profile, Progress, ActivityLog
+
+from matematicas_interactivas.pagination import EstimatedCountPaginator
+
+from .models import Profile, Progress, ActivityLog, ActivityRollup, OperationStats, LeaderboardEntry
+
+# Tipos de actividad que registra la aplicación
+ACTIVITY_TYPES = [
+    'registro',
+    'login',
+    'logout',
+    'actualización_perfil',
+    'inicio_sesion_ejercicios',
+    'fin_sesion_ejercicios',
+]
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
@@ -17,8 +30,49 @@ class ProgressAdmin(admin.ModelAdmin):
         return f"{obj.accuracy_percentage()}%"
     accuracy_percentage.short_description = 'Precisión'
 
+@admin.register(OperationStats)
+class OperationStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'operation_type', 'difficulty', 'category', 'attempts', 'correct', 'accuracy_percentage')
+    search_fields = ('user__username',)
+    list_filter = ('operation_type', 'difficulty', 'category')
+    
+    def accuracy_percentage(self, obj):
+        return f"{obj.accuracy_percentage()}%"
+    accuracy_percentage.short_description = 'Precisión'
+
+class ActivityTypeFilter(admin.SimpleListFilter):
+    """Filtro por tipo de actividad con una lista fija, sin SELECT DISTINCT sobre el registro"""
+    title = 'tipo de actividad'
+    parameter_name = 'activity_type'
+    
+    def lookups(self, request, model_admin):
+        return [(activity_type, activity_type) for activity_type in ACTIVITY_TYPES]
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(activity_type=self.value())
+        return queryset
+
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
     list_display = ('user', 'activity_type', 'timestamp')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    list_filter = (ActivityTypeFilter,)
+    date_hierarchy = 'timestamp'
+    autocomplete_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'activity_type', 'count')
     search_fields = ('user__username', 'activity_type')
-    list_filter = ('activity_type', 'timestamp')
\ No newline at end of file
+    list_filter = ('activity_type', 'date')
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'grade_level', 'operation_type', 'window', 'rank_accuracy', 'rank_volume', 'accuracy', 'attempts', 'updated_at')
+    search_fields = ('user__username',)
+    list_filter = ('grade_level', 'operation_type', 'window')
+    ordering = ('grade_level', 'operation_type', 'window', 'rank_accuracy')
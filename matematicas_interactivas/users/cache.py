@@ -0,0 +1,101 @@
+"""Caché por usuario de la instantánea del dashboard.
+
+Las claves llevan una versión por usuario: invalidar consiste en cambiar la
+versión, así que las instantáneas antiguas simplemente dejan de leerse y
+caducan solas. ``aget_user_version`` y ``bump_user_version`` sirven también
+para otras cachés por usuario, como los fragmentos del historial.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+SNAPSHOT_TIMEOUT = 300
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace, user_id):
+    return f"{namespace}:version:{user_id}"
+
+
+def _new_version():
+    # Una versión basada en el reloj evita reutilizar una versión antigua si
+    # la clave de versión se pierde (por ejemplo, al reiniciar la caché)
+    return time.time_ns()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+async def aget_user_version(cache, namespace, user_id):
+    """Devuelve la versión actual de las claves ``namespace`` de un usuario en ``cache``"""
+    key = _version_key(namespace, user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_user_version(cache, namespace, user_id):
+    """Cambia la versión de las claves ``namespace`` de un usuario en ``cache``"""
+    cache.set(_version_key(namespace, user_id), _new_version(), timeout=None)
+
+
+async def aget_version(user_id):
+    """Devuelve la versión actual de la instantánea de un usuario"""
+    return await aget_user_version(_cache(), 'dashboard', user_id)
+
+
+async def aget_dashboard_snapshot(user_id, build):
+    """Devuelve la instantánea del dashboard, construyéndola con ``build`` si falta.
+
+    ``build`` es una función asíncrona sin argumentos.
+    """
+    cache = _cache()
+    key = f"dashboard:{user_id}:{await aget_version(user_id)}"
+    snapshot = await cache.aget(key)
+    if snapshot is not None:
+        _count('hits')
+        return snapshot
+
+    _count('misses')
+    snapshot = await build()
+    await cache.aset(key, snapshot, timeout=SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def invalidate_dashboard(user_id):
+    """Invalida la instantánea de un usuario cambiando su versión"""
+    _count('invalidations')
+    bump_user_version(_cache(), 'dashboard', user_id)
+
+
+def invalidate_dashboard_on_commit(user_id):
+    """Invalida la instantánea cuando se confirme la transacción en curso"""
+    transaction.on_commit(lambda: invalidate_dashboard(user_id))
+
+
+def cache_stats():
+    """Devuelve los contadores de aciertos y fallos de la caché del dashboard"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups * 100, 2) if lookups else 0
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import LeaderboardEntry, Profile
 
 class UserRegistrationForm(UserCreationForm):
     """Formulario para registro de usuarios"""
@@ -37,4 +37,50 @@ class UserUpdateForm(forms.ModelForm):
     """Formulario para actualizar la información básica del usuario"""
     class Meta:
         model = User
-        fields = ['first_name', 'last_name', 'email']
\ No newline at end of file
+        fields = ['first_name', 'last_name', 'email']
+
+
+class LeaderboardFilterForm(forms.Form):
+    """Formulario para elegir la clasificación que se muestra"""
+    OPERATION_CHOICES = [
+        ('all', 'Todas las operaciones'),
+        ('addition', 'Suma'),
+        ('subtraction', 'Resta'),
+        ('multiplication', 'Multiplicación'),
+        ('division', 'División'),
+    ]
+    
+    ORDER_CHOICES = [
+        ('accuracy', 'Precisión'),
+        ('volume', 'Ejercicios resueltos'),
+    ]
+    
+    grade_level = forms.TypedChoiceField(
+        choices=Profile._meta.get_field('grade_level').choices,
+        coerce=int,
+        required=False,
+        empty_value=None,
+        label='Curso',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    operation_type = forms.ChoiceField(
+        required=False,
+        choices=OPERATION_CHOICES,
+        initial='all',
+        label='Operación',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    window = forms.ChoiceField(
+        required=False,
+        choices=LeaderboardEntry.WINDOW_CHOICES,
+        initial='all',
+        label='Periodo',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    order_by = forms.ChoiceField(
+        required=False,
+        choices=ORDER_CHOICES,
+        initial='accuracy',
+        label='Ordenar por',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
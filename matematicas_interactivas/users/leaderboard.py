@@ -0,0 +1,147 @@
+"""Clasificaciones precalculadas de estudiantes.
+
+Contar aciertos en vivo sobre todos los intentos de un centro es demasiado
+lento, así que ``refresh_leaderboard`` calcula de una vez las posiciones por
+curso, operación y periodo y las guarda en ``LeaderboardEntry``. Leer los K
+primeros o la posición de un estudiante es después una búsqueda por índice.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from exercises.constants import OPERATION_TYPES
+from exercises.models import ExerciseAttempt
+from .models import LeaderboardEntry, OperationStats, Profile, Progress, calculate_percentage
+
+ALL_OPERATIONS = 'all'
+LEADERBOARD_OPERATIONS = [ALL_OPERATIONS] + OPERATION_TYPES
+
+# Días que abarca cada periodo; None es el histórico completo
+WINDOW_DAYS = {
+    'all': None,
+    '30d': 30,
+    '7d': 7,
+}
+
+RANK_FIELDS = {
+    'accuracy': 'rank_accuracy',
+    'volume': 'rank_volume',
+}
+
+
+def _min_attempts():
+    """Intentos necesarios para entrar en la clasificación por precisión"""
+    return getattr(settings, 'LEADERBOARD_MIN_ATTEMPTS', 10)
+
+
+def _window_totals(window):
+    """Devuelve ``{(user_id, operation_type): [intentos, aciertos]}`` de un periodo"""
+    totals = defaultdict(lambda: [0, 0])
+    days = WINDOW_DAYS[window]
+
+    if days is None:
+        # El histórico sale de los contadores ya materializados
+        for user_id, attempts, correct in Progress.objects.values_list('user_id', 'total_exercises', 'correct_answers'):
+            totals[(user_id, ALL_OPERATIONS)] = [attempts, correct]
+        rows = (
+            OperationStats.objects.values_list('user_id', 'operation_type')
+            .annotate(Sum('attempts'), Sum('correct'))
+            .order_by()
+        )
+        for user_id, operation_type, attempts, correct in rows:
+            totals[(user_id, operation_type)] = [attempts, correct]
+        return totals
+
+    since = timezone.now() - timedelta(days=days)
+    rows = (
+        ExerciseAttempt.objects.filter(created_at__gte=since)
+        .values_list('session__user_id', 'exercise__operation_type')
+        .annotate(Count('pk'), Count('pk', filter=Q(is_correct=True)))
+        .order_by()
+    )
+    for user_id, operation_type, attempts, correct in rows:
+        for key in ((user_id, operation_type), (user_id, ALL_OPERATIONS)):
+            totals[key][0] += attempts
+            totals[key][1] += correct
+    return totals
+
+
+def _assign_ranks(entries, sort_key, rank_field):
+    """Asigna posiciones a ``entries``; los empates comparten posición (1, 2, 2, 4)"""
+    ordered = sorted(entries, key=sort_key, reverse=True)
+    previous = None
+    for index, entry in enumerate(ordered, start=1):
+        key = sort_key(entry)
+        if key != previous:
+            rank, previous = index, key
+        setattr(entry, rank_field, rank)
+
+
+def build_entries(window):
+    """Calcula las entradas de la clasificación de un periodo, sin guardarlas"""
+    grade_levels = dict(Profile.objects.values_list('user_id', 'grade_level'))
+    min_attempts = _min_attempts()
+
+    groups = defaultdict(list)
+    for (user_id, operation_type), (attempts, correct) in _window_totals(window).items():
+        if not attempts or user_id not in grade_levels:
+            continue
+        entry = LeaderboardEntry(
+            user_id=user_id,
+            grade_level=grade_levels[user_id],
+            operation_type=operation_type,
+            window=window,
+            attempts=attempts,
+            correct=correct,
+            accuracy=calculate_percentage(correct, attempts),
+        )
+        groups[(entry.grade_level, operation_type)].append(entry)
+
+    entries = []
+    for group in groups.values():
+        _assign_ranks(group, lambda entry: (entry.attempts, entry.correct), 'rank_volume')
+        eligible = [entry for entry in group if entry.attempts >= min_attempts]
+        _assign_ranks(eligible, lambda entry: (entry.accuracy, entry.attempts), 'rank_accuracy')
+        entries.extend(group)
+    return entries
+
+
+def refresh_leaderboard(windows=None, batch_size=500):
+    """Recalcula las clasificaciones de los periodos indicados (todos por defecto).
+
+    Cada periodo se sustituye en su propia transacción, de modo que los
+    lectores siempre ven una clasificación completa. Devuelve el número de
+    entradas guardadas.
+    """
+    total = 0
+    for window in windows or WINDOW_DAYS:
+        entries = build_entries(window)
+        with transaction.atomic():
+            LeaderboardEntry.objects.filter(window=window).delete()
+            LeaderboardEntry.objects.bulk_create(entries, batch_size=batch_size)
+        total += len(entries)
+    return total
+
+
+def top_entries(grade_level, operation_type=ALL_OPERATIONS, window='all', order_by='accuracy', limit=10):
+    """Devuelve los ``limit`` primeros de una clasificación"""
+    rank_field = RANK_FIELDS[order_by]
+    return (
+        LeaderboardEntry.objects.filter(
+            grade_level=grade_level,
+            operation_type=operation_type,
+            window=window,
+            **{f'{rank_field}__isnull': False},
+        )
+        .select_related('user')
+        .order_by(rank_field)[:limit]
+    )
+
+
+def user_entry(user, operation_type=ALL_OPERATIONS, window='all'):
+    """Devuelve la entrada del usuario en una clasificación, o ``None`` si no aparece"""
+    return LeaderboardEntry.objects.filter(user=user, operation_type=operation_type, window=window).first()
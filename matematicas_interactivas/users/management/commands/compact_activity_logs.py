@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from users.models import ActivityLog, ActivityRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta los registros de actividad antiguos en resúmenes diarios por "
+        "usuario y tipo de actividad, y borra los registros originales por lotes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'ACTIVITY_LOG_RETENTION_DAYS', 90),
+            help="Antigüedad (en días) a partir de la cual se compactan los registros.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Registros procesados por transacción.",
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help="Pausa en segundos entre lotes, para dejar paso a otras escrituras.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        total = 0
+
+        while True:
+            compacted = self.compact_batch(cutoff, options['batch_size'])
+            if not compacted:
+                break
+            total += compacted
+            self.stdout.write(f"{total} registros compactados...")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Compactados {total} registros anteriores a {cutoff:%d/%m/%Y}."))
+
+    def compact_batch(self, cutoff, batch_size):
+        """Resume y borra un lote de registros en una transacción corta"""
+        with transaction.atomic():
+            ids = list(
+                ActivityLog.objects.filter(timestamp__lt=cutoff)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+
+            rows = (
+                ActivityLog.objects.filter(pk__in=ids)
+                .annotate(date=TruncDate('timestamp'))
+                .values('user_id', 'date', 'activity_type')
+                .annotate(count=Count('pk'))
+                .order_by()
+            )
+            for row in rows:
+                updated = ActivityRollup.objects.filter(
+                    user_id=row['user_id'], date=row['date'], activity_type=row['activity_type']
+                ).update(count=F('count') + row['count'])
+                if not updated:
+                    ActivityRollup.objects.create(
+                        user_id=row['user_id'],
+                        date=row['date'],
+                        activity_type=row['activity_type'],
+                        count=row['count'],
+                    )
+
+            ActivityLog.objects.filter(pk__in=ids).delete()
+        return len(ids)
@@ -0,0 +1,128 @@
+import csv
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.models import Profile, Progress
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa estudiantes desde un CSV creando User, Profile y Progress en "
+        "lotes, sin pasar por las señales de creación de usuario. Columnas: "
+        "username, email, first_name, last_name y, opcionalmente, password y grade_level"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="Ruta del archivo CSV.")
+        parser.add_argument(
+            '--default-password',
+            help="Contraseña para las filas sin columna password. Sin ella, esas cuentas no podrán iniciar sesión.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Estudiantes creados por transacción.")
+        parser.add_argument('--delimiter', default=',')
+
+    def handle(self, *args, **options):
+        self.password_hashes = {}
+        self.default_password = options['default_password']
+        grade_levels = {value for value, _ in Profile._meta.get_field('grade_level').choices}
+
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8') as csv_file:
+                reader = csv.DictReader(csv_file, delimiter=options['delimiter'])
+                missing = {'username', 'email', 'first_name', 'last_name'} - set(reader.fieldnames or [])
+                if missing:
+                    raise CommandError(f"Faltan columnas en el CSV: {', '.join(sorted(missing))}")
+
+                created = skipped = rejected = 0
+                seen = set()
+                batch = []
+                for line, row in enumerate(reader, start=2):
+                    error = self.validate_row(row, seen, grade_levels)
+                    if error:
+                        # La fila se omite y se sigue con las demás
+                        self.stderr.write(f"Línea {line}: {error}")
+                        rejected += 1
+                        continue
+                    seen.add(row['username'])
+                    batch.append(row | {'grade_level': int(row.get('grade_level') or 1)})
+                    if len(batch) >= options['batch_size']:
+                        batch_created, batch_skipped = self.import_batch(batch)
+                        created, skipped = created + batch_created, skipped + batch_skipped
+                        batch = []
+                if batch:
+                    batch_created, batch_skipped = self.import_batch(batch)
+                    created, skipped = created + batch_created, skipped + batch_skipped
+        except OSError as error:
+            raise CommandError(f"No se pudo leer el CSV: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados {created} estudiantes ({skipped} omitidos porque ya existían)."
+        ))
+        if rejected:
+            raise CommandError(f"{rejected} filas no válidas no se importaron.")
+
+    def validate_row(self, row, seen, grade_levels):
+        """Devuelve el error de la fila, o ``None`` si se puede importar"""
+        username = row.get('username') or ''
+        if not username.strip():
+            return "falta el nombre de usuario."
+        if username in seen:
+            return f"el usuario '{username}' aparece más de una vez en el archivo."
+        grade_level = row.get('grade_level') or '1'
+        try:
+            grade_level = int(grade_level)
+        except ValueError:
+            return f"nivel de bachillerato no válido ({grade_level})."
+        if grade_level not in grade_levels:
+            return f"nivel de bachillerato no válido ({grade_level})."
+        return None
+
+    def hash_password(self, raw_password):
+        """Devuelve el hash de la contraseña; si ya viene cifrada se usa tal cual"""
+        if not raw_password:
+            return make_password(None)
+        try:
+            identify_hasher(raw_password)
+            return raw_password
+        except ValueError:
+            pass
+        # Cifrar cada contraseña distinta una sola vez (el cifrado es lento a propósito)
+        if raw_password not in self.password_hashes:
+            self.password_hashes[raw_password] = make_password(raw_password)
+        return self.password_hashes[raw_password]
+
+    def import_batch(self, rows):
+        """Crea un lote de usuarios con su perfil y progreso en una transacción"""
+        usernames = [row['username'] for row in rows]
+        with transaction.atomic():
+            existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+            new_rows = [row for row in rows if row['username'] not in existing]
+
+            # bulk_create no envía post_save, así que no se disparan las señales por usuario
+            User.objects.bulk_create([
+                User(
+                    username=row['username'],
+                    email=row['email'],
+                    first_name=row['first_name'],
+                    last_name=row['last_name'],
+                    password=self.hash_password(row.get('password') or self.default_password),
+                )
+                for row in new_rows
+            ])
+
+            user_ids = dict(
+                User.objects.filter(username__in=[row['username'] for row in new_rows]).values_list('username', 'id')
+            )
+            Profile.objects.bulk_create([
+                Profile(user_id=user_ids[row['username']], grade_level=row['grade_level'])
+                for row in new_rows
+            ])
+            Progress.objects.bulk_create([
+                Progress(user_id=user_ids[row['username']])
+                for row in new_rows
+            ])
+
+        return len(new_rows), len(rows) - len(new_rows)
@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from exercises.models import ExerciseAttempt
+from users.models import OperationStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye las estadísticas por operación, dificultad y categoría a "
+        "partir de los intentos guardados, por lotes de usuarios"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', help="Reconstruir solo este usuario (repetible).")
+        parser.add_argument('--batch-size', type=int, default=200, help="Usuarios procesados por transacción.")
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help="Pausa en segundos entre lotes, para dejar paso a otras escrituras.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        last_pk = 0
+        total_users = total_rows = 0
+        while True:
+            user_ids = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not user_ids:
+                break
+            total_rows += self.rebuild_batch(user_ids)
+            total_users += len(user_ids)
+            last_pk = user_ids[-1]
+            self.stdout.write(f"{total_users} usuarios procesados...")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconstruidas {total_rows} filas de estadísticas para {total_users} usuarios."
+        ))
+
+    def rebuild_batch(self, user_ids):
+        """Sustituye las estadísticas de un lote de usuarios en una transacción corta"""
+        rows = (
+            ExerciseAttempt.objects.filter(session__user_id__in=user_ids)
+            .values('session__user_id', 'exercise__operation_type', 'exercise__difficulty_id', 'exercise__category_id')
+            .annotate(attempts=Count('pk'), correct=Count('pk', filter=Q(is_correct=True)), total_time=Sum('time_taken'))
+            .order_by()
+        )
+        with transaction.atomic():
+            OperationStats.objects.filter(user_id__in=user_ids).delete()
+            created = OperationStats.objects.bulk_create([
+                OperationStats(
+                    user_id=row['session__user_id'],
+                    operation_type=row['exercise__operation_type'],
+                    difficulty_id=row['exercise__difficulty_id'],
+                    category_id=row['exercise__category_id'],
+                    attempts=row['attempts'],
+                    correct=row['correct'],
+                    total_time=row['total_time'] or timedelta(0),
+                )
+                for row in rows
+            ])
+        return len(created)
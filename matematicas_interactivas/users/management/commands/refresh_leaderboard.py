@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from users.leaderboard import WINDOW_DAYS, refresh_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las clasificaciones por curso, operación y periodo. Pensado "
+        "para ejecutarse periódicamente (por ejemplo, desde cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', action='append', dest='windows', choices=list(WINDOW_DAYS),
+            help="Periodo a recalcular (repetible). Por defecto, todos.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Entradas insertadas por consulta.")
+
+    def handle(self, *args, **options):
+        total = refresh_leaderboard(options['windows'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Guardadas {total} entradas de clasificación."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:45
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='progress',
+            name='total_time_spent',
+            field=models.DurationField(default=datetime.timedelta(0)),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_progress_total_time_spent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('activity_type', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', '-timestamp'], name='activitylog_user_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='activityrollup',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='activityrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'activity_type'), name='unique_activity_rollup'),
+        ),
+    ]
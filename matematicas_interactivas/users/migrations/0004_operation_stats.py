@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:54
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_operation_stats(apps, schema_editor):
+    """Reconstruye las estadísticas por operación a partir de los intentos"""
+    ExerciseAttempt = apps.get_model('exercises', 'ExerciseAttempt')
+    OperationStats = apps.get_model('users', 'OperationStats')
+
+    rows = (
+        ExerciseAttempt.objects.values(
+            'session__user_id', 'exercise__operation_type', 'exercise__difficulty_id', 'exercise__category_id'
+        )
+        .annotate(attempts=Count('pk'), correct=Count('pk', filter=Q(is_correct=True)), total_time=Sum('time_taken'))
+        .order_by()
+    )
+    OperationStats.objects.bulk_create(
+        [
+            OperationStats(
+                user_id=row['session__user_id'],
+                operation_type=row['exercise__operation_type'],
+                difficulty_id=row['exercise__difficulty_id'],
+                category_id=row['exercise__category_id'],
+                attempts=row['attempts'],
+                correct=row['correct'],
+                total_time=row['total_time'] or datetime.timedelta(0),
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0004_exerciseattempt_position'),
+        ('users', '0003_activity_log_index_and_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation_type', models.CharField(max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('total_time', models.DurationField(default=datetime.timedelta(0))),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operation_stats', to='exercises.category')),
+                ('difficulty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operation_stats', to='exercises.difficultylevel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operation_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Operation stats',
+                'constraints': [models.UniqueConstraint(fields=('user', 'operation_type', 'difficulty', 'category'), name='unique_operation_stats')],
+            },
+        ),
+        migrations.RunPython(backfill_operation_stats, migrations.RunPython.noop),
+    ]
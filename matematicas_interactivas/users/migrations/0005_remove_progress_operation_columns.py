@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:54
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_operation_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='progress',
+            name='addition_correct',
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='addition_exercises',
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='division_correct',
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='division_exercises',
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='multiplication_correct',
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='multiplication_exercises',
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='subtraction_correct',
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='subtraction_exercises',
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_remove_progress_operation_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_level', models.IntegerField()),
+                ('operation_type', models.CharField(max_length=20)),
+                ('window', models.CharField(choices=[('all', 'Histórico'), ('30d', 'Últimos 30 días'), ('7d', 'Últimos 7 días')], max_length=3)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('accuracy', models.FloatField(default=0)),
+                ('rank_accuracy', models.PositiveIntegerField(blank=True, null=True)),
+                ('rank_volume', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard entries',
+                'indexes': [models.Index(fields=['grade_level', 'operation_type', 'window', 'rank_accuracy'], name='leaderboard_accuracy_idx'), models.Index(fields=['grade_level', 'operation_type', 'window', 'rank_volume'], name='leaderboard_volume_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'operation_type', 'window'), name='unique_leaderboard_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_progress(apps, schema_editor):
+    """Deja un único registro de progreso por usuario.
+
+    Los contadores se actualizaban con ``filter(user=...).update(...)``, así
+    que todos los duplicados recibieron los mismos incrementos desde que se
+    crearon: el más completo es el de más ejercicios, no la suma de todos.
+    """
+    Progress = apps.get_model('users', 'Progress')
+    duplicated = (
+        Progress.objects.values('user_id').annotate(rows=Count('pk')).filter(rows__gt=1).values_list('user_id', flat=True)
+    )
+    for user_id in list(duplicated):
+        rows = Progress.objects.filter(user_id=user_id).order_by('-total_exercises', 'pk')
+        keep = rows.values_list('pk', flat=True).first()
+        rows.exclude(pk=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_leaderboard_entry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_progress, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='activitylog',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='activity_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='progress',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
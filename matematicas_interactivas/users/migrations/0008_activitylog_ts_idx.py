@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_progress_one_to_one'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['-timestamp'], name='activitylog_ts_idx'),
+        ),
+    ]
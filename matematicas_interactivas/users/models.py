@@ -1,8 +1,15 @@
+from datetime import timedelta
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models import Sum
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from exercises.constants import OPERATION_TYPES
+
+from .cache import invalidate_dashboard_on_commit
+
 class Profile(models.Model):
     """Modelo para extender la información del usuario"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -21,21 +28,11 @@ class Profile(models.Model):
 
 class Progress(models.Model):
     """Modelo para el seguimiento del progreso del estudiante"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='progress')
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='progress')
     total_exercises = models.IntegerField(default=0)
     correct_answers = models.IntegerField(default=0)
-    total_time_spent = models.DurationField(default=0)
+    total_time_spent = models.DurationField(default=timedelta(0))
     last_activity = models.DateTimeField(auto_now=True)
-    
-    # Campos para seguimiento por tipo de operación
-    addition_exercises = models.IntegerField(default=0)
-    addition_correct = models.IntegerField(default=0)
-    subtraction_exercises = models.IntegerField(default=0)
-    subtraction_correct = models.IntegerField(default=0)
-    multiplication_exercises = models.IntegerField(default=0)
-    multiplication_correct = models.IntegerField(default=0)
-    division_exercises = models.IntegerField(default=0)
-    division_correct = models.IntegerField(default=0)
 
     def __str__(self):
         return f"Progreso de {self.user.username}"
@@ -46,36 +43,138 @@ class Progress(models.Model):
             return 0
         return round((self.correct_answers / self.total_exercises) * 100, 2)
     
-    def operation_accuracy(self, operation_type):
-        """Calcula la precisión por tipo de operación"""
-        if operation_type == 'addition':
-            return self._calculate_percentage(self.addition_correct, self.addition_exercises)
-        elif operation_type == 'subtraction':
-            return self._calculate_percentage(self.subtraction_correct, self.subtraction_exercises)
-        elif operation_type == 'multiplication':
-            return self._calculate_percentage(self.multiplication_correct, self.multiplication_exercises)
-        elif operation_type == 'division':
-            return self._calculate_percentage(self.division_correct, self.division_exercises)
+    def operation_stats(self):
+        """Devuelve las estadísticas de cada tipo de operación en una sola consulta"""
+        return summarize_operations(OperationStats.objects.filter(user_id=self.user_id).by_operation())
+
+def calculate_percentage(correct, total):
+    if not total:
         return 0
+    return round((correct / total) * 100, 2)
+
+def summarize_operations(rows):
+    """Convierte las filas de ``by_operation`` en un diccionario por operación"""
+    summary = {
+        operation_type: {'total': 0, 'correct': 0, 'time': timedelta(0), 'accuracy': 0}
+        for operation_type in OPERATION_TYPES
+    }
+    for row in rows:
+        summary[row['operation_type']] = {
+            'total': row['total'],
+            'correct': row['correct'],
+            'time': row['time'],
+            'accuracy': calculate_percentage(row['correct'], row['total']),
+        }
+    return summary
+
+class OperationStatsQuerySet(models.QuerySet):
+    def by_operation(self):
+        """Suma las estadísticas por tipo de operación (todas las dificultades y categorías)"""
+        return (
+            self.values('operation_type')
+            .annotate(total=Sum('attempts'), correct=Sum('correct'), time=Sum('total_time'))
+            .order_by()
+        )
+
+class OperationStats(models.Model):
+    """Modelo para las estadísticas acumuladas por operación, dificultad y categoría"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='operation_stats')
+    operation_type = models.CharField(max_length=20)
+    difficulty = models.ForeignKey('exercises.DifficultyLevel', on_delete=models.CASCADE, related_name='operation_stats')
+    category = models.ForeignKey('exercises.Category', on_delete=models.CASCADE, related_name='operation_stats')
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    total_time = models.DurationField(default=timedelta(0))
     
-    def _calculate_percentage(self, correct, total):
-        if total == 0:
-            return 0
-        return round((correct / total) * 100, 2)
+    objects = OperationStatsQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name_plural = "Operation stats"
+        constraints = [
+            # También sirve de índice para leer todas las estadísticas de un usuario
+            models.UniqueConstraint(
+                fields=['user', 'operation_type', 'difficulty', 'category'],
+                name='unique_operation_stats',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.operation_type} - {self.difficulty}"
+    
+    def accuracy_percentage(self):
+        """Calcula el porcentaje de precisión en esta combinación"""
+        return calculate_percentage(self.correct, self.attempts)
 
 class ActivityLog(models.Model):
     """Modelo para registrar la actividad del usuario"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_logs')
+    # Sin índice propio: lo cubre activitylog_user_ts_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_logs', db_index=False)
     activity_type = models.CharField(max_length=50)
     description = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Actividad de un usuario ordenada por fecha (paginación por cursor)
+            models.Index(fields=['user', '-timestamp'], name='activitylog_user_ts_idx'),
+            # Navegación por fechas y orden por defecto del admin
+            models.Index(fields=['-timestamp'], name='activitylog_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.activity_type} - {self.timestamp}"
 
+class ActivityRollup(models.Model):
+    """Modelo para el resumen diario de la actividad ya compactada"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_rollups')
+    date = models.DateField()
+    activity_type = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date', 'activity_type'], name='unique_activity_rollup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.activity_type} - {self.date} ({self.count})"
+
+class LeaderboardEntry(models.Model):
+    """Modelo para las clasificaciones precalculadas por curso, operación y periodo"""
+    WINDOW_CHOICES = [
+        ('all', 'Histórico'),
+        ('30d', 'Últimos 30 días'),
+        ('7d', 'Últimos 7 días'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    grade_level = models.IntegerField()
+    operation_type = models.CharField(max_length=20)  # 'all' o un tipo de operación
+    window = models.CharField(max_length=3, choices=WINDOW_CHOICES)
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    accuracy = models.FloatField(default=0)
+    rank_accuracy = models.PositiveIntegerField(null=True, blank=True)  # Vacío si no llega al mínimo de intentos
+    rank_volume = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Leaderboard entries"
+        constraints = [
+            # Búsqueda directa de la posición de un usuario
+            models.UniqueConstraint(fields=['user', 'operation_type', 'window'], name='unique_leaderboard_entry'),
+        ]
+        indexes = [
+            # Los K primeros de cada clasificación se leen en orden de índice
+            models.Index(fields=['grade_level', 'operation_type', 'window', 'rank_accuracy'], name='leaderboard_accuracy_idx'),
+            models.Index(fields=['grade_level', 'operation_type', 'window', 'rank_volume'], name='leaderboard_volume_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.operation_type} - {self.window}"
+
 # Señales para crear automáticamente un perfil y un registro de progreso cuando se crea un usuario
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -85,4 +184,18 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+    # Solo se guarda el perfil si se cargó en esta instancia (y pudo cambiar);
+    # así, por ejemplo, actualizar last_login al iniciar sesión no lo reescribe
+    if User.profile.is_cached(instance):
+        instance.profile.save()
+
+# Señales para invalidar la instantánea del dashboard cuando cambian sus datos
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Progress)
+@receiver(post_save, sender=ActivityLog)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard_on_commit(instance.user_id)
+
+@receiver(post_save, sender='exercises.ExerciseAttempt')
+def invalidate_attempt_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard_on_commit(instance.session.user_id)
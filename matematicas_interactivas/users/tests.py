@@ -1,3 +1,241 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from matematicas_interactivas.testing import QueryPlanAssertionsMixin
+
+from .activity import ActivityLogWriter
+from .cache import cache_stats, reset_cache_stats
+from .leaderboard import refresh_leaderboard, top_entries, user_entry
+from .models import ActivityLog, ActivityRollup, Profile, Progress
+from .views import ACTIVITY_LOG_PAGE_SIZE
+
+
+class DashboardCacheTests(TestCase):
+    """Pruebas de la caché de la instantánea del dashboard"""
+
+    def setUp(self):
+        caches['dashboard'].clear()
+        reset_cache_stats()
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        self.client.force_login(self.user)
+
+    def test_second_view_is_served_from_cache(self):
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(cache_stats()['misses'], 1)
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache_stats()['hits'], 1)
+
+    def test_activity_log_write_invalidates_snapshot(self):
+        self.client.get(reverse('dashboard'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ActivityLog.objects.create(user=self.user, activity_type='login', description='Actividad nueva')
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Actividad nueva')
+        self.assertEqual(cache_stats()['misses'], 2)
+
+
+class ActivityLogWriterTests(TestCase):
+    """Pruebas del escritor por lotes del registro de actividad"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+
+    def test_flush_writes_queued_entries_in_one_batch(self):
+        writer = ActivityLogWriter(batch_size=10, max_queue_size=10)
+        for index in range(3):
+            writer.log(self.user, 'login', f"Inicio {index}")
+        self.assertFalse(ActivityLog.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(writer.flush(), 3)
+        self.assertEqual(ActivityLog.objects.filter(user=self.user).count(), 3)
+
+    def test_full_queue_falls_back_to_synchronous_write(self):
+        writer = ActivityLogWriter(max_queue_size=1)
+        writer.log(self.user, 'login', 'En cola')
+        writer.log(self.user, 'login', 'Directo')
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['Directo'])
+
+
+class ActivityLogCompactionTests(TestCase):
+    """Compactación de los registros antiguos y paginación por cursor del registro"""
+
+    def setUp(self):
+        self.ana = User.objects.create_user('ana')
+        self.luis = User.objects.create_user('luis')
+        self.now = timezone.now()
+
+    def create_logs(self, user, activity_type, count, timestamp):
+        logs = ActivityLog.objects.bulk_create([
+            ActivityLog(user=user, activity_type=activity_type, description='') for _ in range(count)
+        ])
+        ActivityLog.objects.filter(pk__in=[log.pk for log in logs]).update(timestamp=timestamp)
+
+    def rollups(self):
+        return dict(
+            ((user, date, activity_type), count)
+            for user, date, activity_type, count in ActivityRollup.objects.values_list(
+                'user__username', 'date', 'activity_type', 'count'
+            )
+        )
+
+    def test_old_logs_are_rolled_up_and_deleted_across_batches(self):
+        old = self.now - timedelta(days=100)
+        older = self.now - timedelta(days=101)
+        self.create_logs(self.ana, 'login', 3, old)
+        self.create_logs(self.ana, 'logout', 1, old)
+        self.create_logs(self.luis, 'login', 2, older)
+        self.create_logs(self.ana, 'login', 2, self.now)
+
+        # Lotes de 2: los grupos quedan repartidos entre varios lotes
+        call_command('compact_activity_logs', '--days', '90', '--batch-size', '2', stdout=StringIO())
+
+        self.assertEqual(self.rollups(), {
+            ('ana', timezone.localdate(old), 'login'): 3,
+            ('ana', timezone.localdate(old), 'logout'): 1,
+            ('luis', timezone.localdate(older), 'login'): 2,
+        })
+        self.assertEqual(ActivityLog.objects.count(), 2)
+        self.assertFalse(ActivityLog.objects.filter(timestamp__lt=self.now - timedelta(days=90)).exists())
+
+    def test_rerun_adds_to_existing_rollups(self):
+        old = self.now - timedelta(days=100)
+        self.create_logs(self.ana, 'login', 2, old)
+        call_command('compact_activity_logs', '--days', '90', stdout=StringIO())
+        self.create_logs(self.ana, 'login', 3, old)
+        call_command('compact_activity_logs', '--days', '90', stdout=StringIO())
+
+        self.assertEqual(self.rollups(), {('ana', timezone.localdate(old), 'login'): 5})
+
+    def test_activity_log_pages_are_stable_when_timestamps_tie(self):
+        self.create_logs(self.ana, 'login', ACTIVITY_LOG_PAGE_SIZE + 10, self.now)
+        self.client.force_login(self.ana)
+
+        first = self.client.get(reverse('activity_log')).context['logs']
+        self.assertTrue(first.has_next)
+        second = self.client.get(reverse('activity_log'), {'cursor': first.next_cursor}).context['logs']
+        self.assertFalse(second.has_next)
+
+        ids = [log.id for log in first] + [log.id for log in second]
+        expected = list(ActivityLog.objects.filter(user=self.ana).order_by('-pk').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+
+class ImportStudentsTests(TestCase):
+    """Pruebas de la importación masiva de estudiantes"""
+
+    def test_creates_users_with_profile_and_progress(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as csv_file:
+            csv_file.write("username,email,first_name,last_name,grade_level\n")
+            for index in range(5):
+                csv_file.write(f"alumno{index},alumno{index}@example.com,Nombre,Apellido,2\n")
+        self.addCleanup(os.remove, csv_file.name)
+
+        call_command('import_students', csv_file.name, default_password='clave-segura-123', stdout=StringIO())
+
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Profile.objects.filter(grade_level=2).count(), 5)
+        self.assertEqual(Progress.objects.count(), 5)
+        self.assertTrue(self.client.login(username='alumno3', password='clave-segura-123'))
+
+    def import_csv(self, *lines):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as csv_file:
+            csv_file.write("username,email,first_name,last_name,grade_level\n")
+            csv_file.write(''.join(f"{line}\n" for line in lines))
+        self.addCleanup(os.remove, csv_file.name)
+        stderr = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_students', csv_file.name, stdout=StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_invalid_grade_levels_are_reported_and_skipped(self):
+        errors = self.import_csv(
+            "ana,ana@example.com,Ana,García,segundo",
+            "luis,luis@example.com,Luis,Pérez,7",
+            "eva,eva@example.com,Eva,Ruiz,3",
+        )
+        self.assertIn("Línea 2: nivel de bachillerato no válido (segundo)", errors)
+        self.assertIn("Línea 3: nivel de bachillerato no válido (7)", errors)
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['eva'])
+
+    def test_repeated_usernames_are_imported_once(self):
+        errors = self.import_csv(
+            "ana,ana@example.com,Ana,García,1",
+            "ana,otra@example.com,Ana,López,2",
+        )
+        self.assertIn("Línea 3: el usuario 'ana' aparece más de una vez", errors)
+        self.assertEqual(User.objects.get().email, 'ana@example.com')
+        self.assertEqual(Profile.objects.get().grade_level, 1)
+
+    def test_login_does_not_rewrite_the_profile(self):
+        User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.login(username='estudiante', password='clave-segura-123')
+        self.assertFalse(any('users_profile' in query['sql'] for query in queries))
+
+
+class LeaderboardTests(TestCase):
+    """Pruebas de las clasificaciones precalculadas"""
+
+    def create_student(self, username, attempts, correct, grade_level=1):
+        user = User.objects.create_user(username, f'{username}@example.com', 'clave-segura-123')
+        Profile.objects.filter(user=user).update(grade_level=grade_level)
+        Progress.objects.filter(user=user).update(total_exercises=attempts, correct_answers=correct)
+        return user
+
+    def test_ranks_are_computed_per_grade(self):
+        first = self.create_student('primera', 20, 19)
+        second = self.create_student('segunda', 40, 30)
+        beginner = self.create_student('novata', 5, 5)
+        self.create_student('otro_curso', 50, 50, grade_level=2)
+
+        call_command('refresh_leaderboard', window=['all'], stdout=StringIO())
+
+        by_accuracy = [entry.user for entry in top_entries(1, order_by='accuracy')]
+        by_volume = [entry.user for entry in top_entries(1, order_by='volume')]
+        self.assertEqual(by_accuracy, [first, second])
+        self.assertEqual(by_volume, [second, first, beginner])
+        self.assertIsNone(user_entry(beginner).rank_accuracy)
+
+    def test_view_shows_my_rank(self):
+        student = self.create_student('estudiante', 30, 15)
+        refresh_leaderboard(['all'])
+        self.client.force_login(student)
+
+        response = self.client.get(reverse('leaderboard'), {'order_by': 'volume', 'grade_level': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['my_entry'].rank_volume, 1)
+
+
+class QueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """Los accesos más frecuentes usan sus índices (EXPLAIN)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'clave-segura-123')
+
+    def test_activity_log_by_user(self):
+        logs = ActivityLog.objects.filter(user=self.user).order_by('-timestamp')[:50]
+        self.assertUsesIndex(logs, 'activitylog_user_ts_idx')
+
+    def test_progress_is_one_per_user(self):
+        self.assertUsesIndex(Progress.objects.filter(user=self.user), 'sqlite_autoindex_users_progress_1')
+        self.assertEqual(self.user.progress.total_exercises, 0)
 
-# Create your tests here.
+    def test_leaderboard_top_entries(self):
+        self.assertUsesIndex(top_entries(1, order_by='accuracy'), 'leaderboard_accuracy_idx')
+        self.assertUsesIndex(top_entries(1, order_by='volume'), 'leaderboard_volume_idx')
@@ -9,4 +9,5 @@ urlpatterns = [
     path('profile/', views.profile_view, name='profile'),
     path('progress/', views.progress_view, name='progress'),
     path('activity-log/', views.activity_log_view, name='activity_log'),
+    path('leaderboard/', views.leaderboard_view, name='leaderboard'),
 ]
\ No newline at end of file
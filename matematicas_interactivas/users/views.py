@@ -4,8 +4,16 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Sum, Avg
 from datetime import timedelta, datetime
-from .forms import UserRegistrationForm, UserLoginForm, ProfileUpdateForm, UserUpdateForm
-from .models import Profile, Progress, ActivityLog
+from .forms import UserRegistrationForm, UserLoginForm, ProfileUpdateForm, UserUpdateForm, LeaderboardFilterForm
+from .models import Profile, Progress, ActivityLog, OperationStats, summarize_operations
+from .cache import aget_dashboard_snapshot
+from .activity import log_activity
+from .leaderboard import top_entries, user_entry
+from matematicas_interactivas.pagination import keyset_paginate
+from matematicas_interactivas.shortcuts import alist, arender
+
+ACTIVITY_LOG_PAGE_SIZE = 50
+LEADERBOARD_SIZE = 20
 
 def register_view(request):
     """Vista para el registro de usuarios"""
@@ -14,7 +22,7 @@ def register_view(request):
         if form.is_valid():
             user = form.save()
             # Crear registro de actividad
-            ActivityLog.objects.create(
+            log_activity(
                 user=user,
                 activity_type='registro',
                 description='Usuario registrado en el sistema'
@@ -36,7 +44,7 @@ def login_view(request):
             if user is not None:
                 login(request, user)
                 # Crear registro de actividad
-                ActivityLog.objects.create(
+                log_activity(
                     user=user,
                     activity_type='login',
                     description='Inicio de sesión exitoso'
@@ -53,7 +61,7 @@ def login_view(request):
 def logout_view(request):
     """Vista para cerrar sesión"""
     # Crear registro de actividad
-    ActivityLog.objects.create(
+    log_activity(
         user=request.user,
         activity_type='logout',
         description='Cierre de sesión'
@@ -62,34 +70,45 @@ def logout_view(request):
     messages.success(request, '¡Has cerrado sesión exitosamente!')
     return redirect('login')
 
-@login_required
-def dashboard_view(request):
-    """Vista para el dashboard del usuario"""
-    user = request.user
-    progress = Progress.objects.get(user=user)
+async def build_dashboard_snapshot(user):
+    """Construye los datos del dashboard que se guardan en caché"""
+    progress = await Progress.objects.aget(user=user)
+    profile = await Profile.objects.aget(user=user)
+    # Obtener actividad reciente
+    recent_activity = await alist(ActivityLog.objects.filter(user=user).order_by('-timestamp')[:5])
+    operation_rows = await alist(OperationStats.objects.filter(user=user).by_operation())
+    operation_stats = summarize_operations(operation_rows)
     
     # Obtener estadísticas de rendimiento
     stats = {
         'total_exercises': progress.total_exercises,
         'correct_answers': progress.correct_answers,
         'accuracy': progress.accuracy_percentage(),
-        'addition_accuracy': progress.operation_accuracy('addition'),
-        'subtraction_accuracy': progress.operation_accuracy('subtraction'),
-        'multiplication_accuracy': progress.operation_accuracy('multiplication'),
-        'division_accuracy': progress.operation_accuracy('division'),
     }
+    for operation_type, operation in operation_stats.items():
+        stats[f'{operation_type}_accuracy'] = operation['accuracy']
     
-    # Obtener actividad reciente
-    recent_activity = ActivityLog.objects.filter(user=user).order_by('-timestamp')[:5]
-    
-    context = {
-        'user': user,
-        'profile': user.profile,
+    return {
+        'profile': profile,
         'progress': progress,
         'stats': stats,
         'recent_activity': recent_activity,
     }
-    return render(request, 'users/dashboard.html', context)
+
+@login_required
+async def dashboard_view(request):
+    """Vista para el dashboard del usuario"""
+    user = await request.auser()
+    snapshot = await aget_dashboard_snapshot(user.id, lambda: build_dashboard_snapshot(user))
+    
+    context = {
+        'user': user,
+        'profile': snapshot['profile'],
+        'progress': snapshot['progress'],
+        'stats': snapshot['stats'],
+        'recent_activity': snapshot['recent_activity'],
+    }
+    return await arender(request, 'users/dashboard.html', context)
 
 @login_required
 def profile_view(request):
@@ -102,7 +121,7 @@ def profile_view(request):
             user_form.save()
             profile_form.save()
             # Crear registro de actividad
-            ActivityLog.objects.create(
+            log_activity(
                 user=request.user,
                 activity_type='actualización_perfil',
                 description='Perfil actualizado'
@@ -125,29 +144,8 @@ def progress_view(request):
     user = request.user
     progress = Progress.objects.get(user=user)
     
-    # Estadísticas por tipo de operación
-    operation_stats = {
-        'addition': {
-            'total': progress.addition_exercises,
-            'correct': progress.addition_correct,
-            'accuracy': progress.operation_accuracy('addition')
-        },
-        'subtraction': {
-            'total': progress.subtraction_exercises,
-            'correct': progress.subtraction_correct,
-            'accuracy': progress.operation_accuracy('subtraction')
-        },
-        'multiplication': {
-            'total': progress.multiplication_exercises,
-            'correct': progress.multiplication_correct,
-            'accuracy': progress.operation_accuracy('multiplication')
-        },
-        'division': {
-            'total': progress.division_exercises,
-            'correct': progress.division_correct,
-            'accuracy': progress.operation_accuracy('division')
-        }
-    }
+    # Estadísticas por tipo de operación, en una sola consulta
+    operation_stats = progress.operation_stats()
     
     context = {
         'progress': progress,
@@ -159,9 +157,52 @@ def progress_view(request):
 def activity_log_view(request):
     """Vista para ver el historial de actividad del usuario"""
     user = request.user
-    logs = ActivityLog.objects.filter(user=user).order_by('-timestamp')
+    cursor = request.GET.get('cursor')
+    logs = keyset_paginate(
+        ActivityLog.objects.filter(user=user),
+        'timestamp',
+        cursor=cursor,
+        page_size=ACTIVITY_LOG_PAGE_SIZE,
+    )
     
     context = {
         'logs': logs,
+        'next_cursor': logs.next_cursor,
+        'is_first_page': not cursor,
+    }
+    return render(request, 'users/activity_log.html', context)
+
+@login_required
+def leaderboard_view(request):
+    """Vista para ver las clasificaciones por curso, operación y periodo"""
+    initial = {
+        'grade_level': request.user.profile.grade_level,
+        'operation_type': 'all',
+        'window': 'all',
+        'order_by': 'accuracy',
+    }
+    form = LeaderboardFilterForm(request.GET or None, initial=initial)
+    filters = dict(initial)
+    if form.is_valid():
+        # Los filtros que no se envían mantienen su valor por defecto
+        filters.update({name: value for name, value in form.cleaned_data.items() if value})
+    
+    # Las posiciones ya están calculadas; aquí solo se leen por índice
+    entries = top_entries(
+        filters['grade_level'],
+        filters['operation_type'],
+        filters['window'],
+        order_by=filters['order_by'],
+        limit=LEADERBOARD_SIZE,
+    )
+    my_entry = user_entry(request.user, filters['operation_type'], filters['window'])
+    if my_entry is not None and my_entry.grade_level != filters['grade_level']:
+        my_entry = None
+    
+    context = {
+        'form': form,
+        'entries': entries,
+        'my_entry': my_entry,
+        'order_by': filters['order_by'],
     }
-    return render(request, 'users/activity_log.html', context)
\ No newline at end of file
+    return render(request, 'users/leaderboard.html', context)